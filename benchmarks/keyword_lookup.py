@@ -0,0 +1,109 @@
+"""Microbenchmark: per-token cost of keyword and operator lookups in GenericLexer.
+
+Tokenizes lines of identifiers and operators against keyword lists of growing size,
+case sensitive and case insensitive, and prints the cost per token. The "legacy" column
+is the lookup the lexer used to do for every identifier (rebuilding lowercased keyword
+sets), kept here for comparison.
+
+Usage: python benchmarks/keyword_lookup.py [--tokens N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "notepadpypp"))
+
+from PyQt6.QtWidgets import QApplication
+
+from generic_lexer import GenericLexer
+
+OPERATORS = ["+", "-", "*", "/", "//", "%", "**", "=", "==", "!=", "<", ">", "<=", ">=", "<<", ">>", "<<=", ">>=", "(", ")", ",", "."]
+
+
+def make_config(keyword_count, case_sensitive):
+    keywords = [f"kw{i:05d}" for i in range(keyword_count)]
+    return {
+        "case_sensitive": case_sensitive,
+        "line_comment": "#",
+        "keywords1": keywords[0::4],
+        "keywords2": keywords[1::4],
+        "keywords3": keywords[2::4],
+        "keywords4": keywords[3::4],
+        "operators": OPERATORS,
+    }
+
+
+def make_tokens(keyword_count, count):
+    rng = random.Random(keyword_count)
+    tokens = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            tokens.append(f"KW{rng.randrange(max(keyword_count, 1)):05d}")
+        elif roll < 0.7:
+            tokens.append(f"ident{rng.randrange(1000)}")
+        else:
+            tokens.append(rng.choice(OPERATORS))
+    return tokens
+
+
+def legacy_lookup(config, words):
+    """The per-identifier lookup GenericLexer used to do for case-insensitive languages."""
+    keyword_lists = [set(config[f"keywords{i}"]) for i in range(1, 5)]
+    for word in words:
+        word_check = word.lower()
+        for keywords in keyword_lists:
+            if word_check in {k.lower() for k in keywords}:
+                break
+
+
+def per_token_ns(function, token_count, repeat=3):
+    best = min(_timed(function) for _ in range(repeat))
+    return best / token_count * 1e9
+
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20000, help="tokens per measurement")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    print(f"{'keywords':>9} {'case':>12} {'build ms':>9} {'ns/token':>9} {'legacy ns/token':>16}")
+    for keyword_count in (10, 1000, 5000):
+        tokens = make_tokens(keyword_count, args.tokens)
+        line = " ".join(tokens) + "\n"
+        words = [token for token in tokens if token[0].isalpha()]
+
+        for case_sensitive in (True, False):
+            config = make_config(keyword_count, case_sensitive)
+
+            GenericLexer._rules_cache.clear()
+            build_start = time.perf_counter()
+            lexer = GenericLexer(lang_name="Benchmark", config=config)
+            build_ms = (time.perf_counter() - build_start) * 1000
+
+            cost = per_token_ns(lambda: lexer.style_line(line, GenericLexer.STATE_DEFAULT, bytearray()), len(tokens))
+
+            legacy = ""
+            if not case_sensitive:
+                # the legacy lookup is far too slow to run over every token
+                sample = words[:200]
+                legacy = f"{per_token_ns(lambda: legacy_lookup(config, sample), len(sample), repeat=1):.0f}"
+
+            print(f"{keyword_count:>9} {'sensitive' if case_sensitive else 'insensitive':>12} {build_ms:>9.1f} {cost:>9.0f} {legacy:>16}")
+
+    del app
+
+
+if __name__ == "__main__":
+    main()
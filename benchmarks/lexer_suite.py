@@ -0,0 +1,340 @@
+"""Headless benchmark suite for syntax highlighting throughput and edit latency.
+
+Styles synthetic corpora (long lines, deep block comments, string-heavy JSON, a user defined
+language with 5000 keywords) and real files from this repository with GenericLexer languages
+and the built-in QsciLexer classes from file_types.DEFAULT_LEXER_TYPES. For every corpus and
+lexer it reports characters per second for a full style pass, the latency of restyling after a
+one-character edit, and a digest of the resulting styles.
+
+Results are written as JSON. Passing an earlier result file with --compare checks that every
+corpus/lexer pair still produces identical styles and shows the change in throughput, so a new
+lexer engine can be compared against the current one.
+
+Usage: python benchmarks/lexer_suite.py [--size BYTES] [--output FILE] [--compare FILE]
+                                        [--all-builtin] [--corpus PATH ...]
+"""
+import argparse
+import ctypes
+import glob
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "notepadpypp")
+sys.path.insert(0, SOURCE_DIR)
+
+from PyQt6.QtCore import PYQT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+from PyQt6.Qsci import QSCINTILLA_VERSION_STR, QsciScintilla, QsciLexerCPP, QsciLexerJSON, QsciLexerPython
+
+from generic_lexer import GenericLexer
+import file_types
+
+RESULT_VERSION = 1
+EDIT_VIEWPORT_LINES = 60
+
+
+class CharacterRange(ctypes.Structure):
+    _fields_ = [("cpMin", ctypes.c_long), ("cpMax", ctypes.c_long)]
+
+
+class TextRange(ctypes.Structure):
+    _fields_ = [("chrg", CharacterRange), ("lpstrText", ctypes.c_char_p)]
+
+
+def udl_5k_config():
+    keywords = [f"kw{i:04d}" for i in range(5000)]
+    return {
+        "name": "UDL5k",
+        "case_sensitive": False,
+        "line_comment": "#",
+        "block_comment_start": "/*",
+        "block_comment_end": "*/",
+        "string_delimiters": ["\"", "'"],
+        "keywords1": keywords[0::4],
+        "keywords2": keywords[1::4],
+        "keywords3": keywords[2::4],
+        "keywords4": keywords[3::4],
+        "operators": ["+", "-", "*", "/", "=", "==", "<", ">", "(", ")", "{", "}", ",", ";"],
+    }
+
+
+# synthetic corpora: name -> (file name used to pick the lexer, generator(rng, size))
+
+def long_lines(rng, size):
+    parts = []
+    while sum(map(len, parts)) < size:
+        items = ", ".join(f"'item{rng.randrange(10**6)}': {rng.random():.6f}" for _ in range(250))
+        parts.append(f"values_{len(parts)} = {{{items}}}  # generated\n")
+    return "".join(parts)
+
+
+def block_comments(rng, size):
+    parts = []
+    while sum(map(len, parts)) < size:
+        comment = "\n".join(f" * {'lorem ipsum dolor sit amet ' * rng.randrange(1, 4)}" for _ in range(rng.randrange(50, 400)))
+        parts.append(f"/*\n{comment}\n */\nint f{len(parts)}(int x) {{ return x * {rng.randrange(100)}; /* inline */ }}\n")
+    return "".join(parts)
+
+
+def json_strings(rng, size):
+    records = []
+    length = 0
+    while length < size:
+        record = {
+            "id": len(records),
+            "name": f"récord \\\"{rng.randrange(10**6)}\\\"",
+            "tags": [f"tag{rng.randrange(100)}" for _ in range(rng.randrange(1, 6))],
+            "text": " ".join(f"word{rng.randrange(1000)}" for _ in range(rng.randrange(5, 30))),
+            "active": rng.random() < 0.5,
+            "parent": None,
+        }
+        records.append(record)
+        length += len(json.dumps(record))
+    return json.dumps(records, indent=2)
+
+
+def udl_keywords(rng, size):
+    words = [f"KW{i:04d}" for i in range(5000)] + [f"ident{i}" for i in range(500)]
+    lines = []
+    length = 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.1:
+            line = f"# comment {rng.choice(words)}"
+        elif roll < 0.2:
+            line = f"say(\"string {rng.choice(words)}\");"
+        else:
+            line = " ".join(rng.choice(words) if rng.random() < 0.7 else rng.choice("+-*/=<>(){},;") for _ in range(12))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+SYNTHETIC_CORPORA = {
+    "long_lines": ("long_lines.py", long_lines),
+    "block_comments": ("block_comments.cpp", block_comments),
+    "json_strings": ("json_strings.json", json_strings),
+    "udl_5k_keywords": ("udl_5k_keywords.udl", udl_keywords),
+}
+
+# built-in lexers every corpus is compared against, on top of the one the editor would pick
+COMPARISON_LEXERS = {
+    ".py": [QsciLexerPython],
+    ".cpp": [QsciLexerCPP],
+    ".json": [QsciLexerJSON],
+}
+
+
+def real_corpora():
+    corpora = {}
+    sources = sorted(glob.glob(os.path.join(SOURCE_DIR, "*.py")))
+    corpora["repo_python"] = ("repo_python.py", "".join(read_text(path) for path in sources))
+    languages = sorted(glob.glob(os.path.join(SOURCE_DIR, "lexer", "*.json")))
+    corpora["repo_lexer_json"] = ("repo_lexer_json.json", "".join(read_text(path) for path in languages))
+    return corpora
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return file.read()
+
+
+def lexer_factories(file_name, all_builtin):
+    """Returns (name, factory) for every lexer to run over a corpus with the given file name."""
+    factories = {}
+
+    if file_name.endswith(".udl"):
+        config = udl_5k_config()
+        factories["generic:UDL5k"] = lambda: GenericLexer(lang_name="UDL5k", config=config)
+
+    lexer_class = file_types.get_lexer_for_file(file_name)
+    if lexer_class is not None:
+        factories[lexer_name(lexer_class)] = lexer_class
+
+    ext = os.path.splitext(file_name)[1]
+    classes = list(COMPARISON_LEXERS.get(ext, []))
+    if all_builtin:
+        classes += [cls for cls in file_types.DEFAULT_LEXER_TYPES.values() if not issubclass(cls, GenericLexer) and instantiable(cls)]
+    for cls in classes:
+        factories.setdefault(lexer_name(cls), cls)
+
+    return factories
+
+
+def instantiable(lexer_class):
+    # some built-in lexers (QsciLexerAsm) are abstract bases
+    try:
+        lexer_class()
+    except TypeError:
+        return False
+    return True
+
+
+def lexer_name(lexer_class):
+    if issubclass(lexer_class, GenericLexer):
+        return f"generic:{lexer_class.__name__[:-len('Lexer')]}"
+    return lexer_class.__name__
+
+
+def style_bytes(editor):
+    length = editor.length()
+    buffer = ctypes.create_string_buffer(2 * length + 2)
+    text_range = TextRange(CharacterRange(0, length), ctypes.cast(buffer, ctypes.c_char_p))
+    editor.SendScintilla(QsciScintilla.SCI_GETSTYLEDTEXT, 0, ctypes.addressof(text_range))
+    return buffer.raw[1:2 * length:2]
+
+
+def new_editor(factory, text):
+    editor = QsciScintilla()
+    editor.setUtf8(True)
+    lexer = factory()
+    editor.setLexer(lexer)
+    editor.setText(text)
+    return editor, lexer
+
+
+def measure(factory, text, edits):
+    editor, lexer = new_editor(factory, text)
+
+    started = time.perf_counter()
+    editor.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, -1)
+    full_pass = time.perf_counter() - started
+    digest = hashlib.sha1(style_bytes(editor)).hexdigest()
+
+    viewport_latencies = []
+    to_end_latencies = []
+    length = editor.length()
+    for fraction in edits:
+        position = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, int(editor.lines() * fraction))
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        viewport_end = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line + EDIT_VIEWPORT_LINES)
+        if viewport_end < 0:
+            viewport_end = length
+
+        editor.SendScintilla(QsciScintilla.SCI_INSERTTEXT, position, b"x")
+
+        # what repainting the screen after the keystroke costs
+        started = time.perf_counter()
+        editor.SendScintilla(QsciScintilla.SCI_COLOURISE, position, viewport_end)
+        viewport_latencies.append(time.perf_counter() - started)
+
+        # everything after the edit, as if the rest of the document were scrolled through
+        started = time.perf_counter()
+        editor.SendScintilla(QsciScintilla.SCI_COLOURISE, editor.SendScintilla(QsciScintilla.SCI_GETENDSTYLED), -1)
+        to_end_latencies.append(time.perf_counter() - started)
+
+        editor.SendScintilla(QsciScintilla.SCI_DELETERANGE, position, 1)
+        editor.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, -1)
+
+    editor.setLexer(None)
+    del lexer
+
+    return {
+        "chars": len(text),
+        "bytes": length,
+        "full_pass_s": round(full_pass, 6),
+        "chars_per_s": round(len(text) / full_pass) if full_pass else None,
+        "edit_viewport_ms": round(statistics.median(viewport_latencies) * 1000, 3),
+        "edit_to_end_ms": round(statistics.median(to_end_latencies) * 1000, 3),
+        "text_sha1": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+        "styles_sha1": digest,
+    }
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    corpora = {name: (file_name, generate(rng, args.size)) for name, (file_name, generate) in SYNTHETIC_CORPORA.items()}
+    corpora.update(real_corpora())
+    for path in args.corpus:
+        corpora[os.path.basename(path)] = (path, read_text(path))
+
+    results = []
+    for corpus_name, (file_name, text) in corpora.items():
+        for name, factory in lexer_factories(file_name, args.all_builtin).items():
+            best = None
+            for _ in range(args.repeat):
+                result = measure(factory, text, edits=(0.25, 0.5, 0.75))
+                if best is None or result["full_pass_s"] < best["full_pass_s"]:
+                    best = result
+            results.append({"corpus": corpus_name, "lexer": name, **best})
+            print(f"{corpus_name:>18} {name:>24} {best['chars_per_s'] or 0:>12,} chars/s "
+                  f"{best['edit_viewport_ms']:>9.3f} ms edit {best['edit_to_end_ms']:>10.3f} ms to end", file=sys.stderr)
+
+    return {
+        "version": RESULT_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "pyqt": PYQT_VERSION_STR,
+            "qscintilla": QSCINTILLA_VERSION_STR,
+            "platform": platform.platform(),
+        },
+        "settings": {"size": args.size, "seed": args.seed, "repeat": args.repeat},
+        "results": results,
+    }
+
+
+def compare(report, baseline_path):
+    """Prints how the report differs from a baseline; returns False if any styles changed."""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    if baseline.get("settings", {}).get("size") != report["settings"]["size"] or baseline.get("settings", {}).get("seed") != report["settings"]["seed"]:
+        print("warning: baseline was run with different corpus settings, styles will not match", file=sys.stderr)
+
+    previous = {(result["corpus"], result["lexer"]): result for result in baseline.get("results", [])}
+    identical = True
+    for result in report["results"]:
+        old = previous.get((result["corpus"], result["lexer"]))
+        if old is None:
+            continue
+
+        if old.get("text_sha1") != result["text_sha1"]:
+            status = "corpus changed"
+        elif old["styles_sha1"] == result["styles_sha1"]:
+            status = "identical"
+        else:
+            status = "DIFFERENT"
+            identical = False
+
+        speedup = result["chars_per_s"] / old["chars_per_s"] if old["chars_per_s"] and result["chars_per_s"] else 0
+        print(f"{result['corpus']:>18} {result['lexer']:>24} {status:>14} {speedup:>6.2f}x throughput", file=sys.stderr)
+
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1 << 20, help="approximate size of each synthetic corpus in characters")
+    parser.add_argument("--seed", type=int, default=8, help="seed for the synthetic corpora")
+    parser.add_argument("--repeat", type=int, default=1, help="full passes per measurement, the fastest is kept")
+    parser.add_argument("--corpus", action="append", default=[], help="extra file to benchmark, lexer picked by extension")
+    parser.add_argument("--all-builtin", action="store_true", help="run every built-in QsciLexer over every corpus")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to check for identical output against")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    identical = compare(report, args.compare) if args.compare else True
+
+    del app
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
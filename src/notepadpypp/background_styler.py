@@ -0,0 +1,145 @@
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.Qsci import QsciScintilla
+
+import document_buffer
+
+
+class BackgroundStyler(QObject):
+    """Styles the rest of a document in the background.
+
+    Lexers that can tokenize a snapshot of the text (GenericLexer) do so on a worker thread,
+    and the main thread only applies the finished styles. Other lexers are colourised in
+    small time-boxed slices while the event loop is idle."""
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal()
+    tokenized = pyqtSignal(object)
+
+    MIN_SLICE = 0x1000 # bytes
+    MIN_SNAPSHOT = 0x1000
+    MAX_SNAPSHOT = 0x40000 # bytes handed to the worker thread at a time
+    MAX_SKIPPED_LINES = 0x4000 # lines checked for still valid styles per event loop pass
+    VIEWPORT_MARGIN = 100 # lines styled past the bottom of the screen up front
+
+    def __init__(self, editor, lexer, time_budget_ms=10, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.lexer = lexer
+        self.time_budget = time_budget_ms / 1000
+        self.slice_size = 0x8000
+        self.snapshot_size = self.MAX_SNAPSHOT
+        self.cancelled = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.style_next_slice)
+        self.tokenized.connect(self.apply_snapshot)
+
+    @classmethod
+    def viewport_end(cls, editor):
+        """Returns the position just past the visible lines plus a margin."""
+        first_visible = editor.SendScintilla(QsciScintilla.SCI_GETFIRSTVISIBLELINE)
+        first_line = editor.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, first_visible)
+        last_line = first_line + editor.SendScintilla(QsciScintilla.SCI_LINESONSCREEN) + cls.VIEWPORT_MARGIN
+        if last_line >= editor.lines():
+            return editor.length()
+        return editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, last_line)
+
+    def start(self):
+        if hasattr(self.lexer, "tokenize"):
+            self.tokenize_next_snapshot()
+        else:
+            self.timer.start()
+
+    def cancel(self):
+        """Stops styling; whatever is left unstyled gets styled on demand again."""
+        self.cancelled = True
+        self.timer.stop()
+        if hasattr(self.lexer, "styling_horizon"):
+            self.lexer.styling_horizon = None
+
+    def finish(self):
+        self.cancel()
+        self.progress.emit(100)
+        self.finished.emit()
+
+    def extend_horizon(self, end):
+        if getattr(self.lexer, "styling_horizon", None) is not None:
+            self.lexer.styling_horizon = max(self.lexer.styling_horizon, end)
+
+    def style_next_slice(self):
+        length = self.editor.length()
+        styled = self.editor.SendScintilla(QsciScintilla.SCI_GETENDSTYLED)
+        if styled >= length:
+            self.finish()
+            return
+
+        end = min(length, styled + self.slice_size)
+        self.extend_horizon(end)
+
+        started = time.perf_counter()
+        self.editor.SendScintilla(QsciScintilla.SCI_COLOURISE, styled, end)
+        elapsed = time.perf_counter() - started
+
+        # size the next slice to fill the time budget
+        self.slice_size = max(self.MIN_SLICE, int((end - styled) * self.time_budget / max(elapsed, 1e-4)))
+        self.progress.emit(end * 100 // length)
+
+    def tokenize_next_snapshot(self):
+        """Hands the next run of unstyled lines to a worker thread."""
+        if self.cancelled:
+            return
+
+        editor = self.editor
+        length = editor.length()
+        styled = editor.SendScintilla(QsciScintilla.SCI_GETENDSTYLED)
+        if styled >= length:
+            self.finish()
+            return
+
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, styled)
+
+        # lines whose styles survived the edits since they were styled don't need a snapshot
+        skipped = self.lexer.first_stale_line(editor, line, line + self.MAX_SKIPPED_LINES)
+        if skipped > line:
+            self.lexer.startStyling(length if skipped >= editor.lines() else editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, skipped))
+            QTimer.singleShot(0, self.tokenize_next_snapshot)
+            return
+        start = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        end_line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, min(length, start + self.snapshot_size)) + 1
+        end = length if end_line >= editor.lines() else editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, end_line)
+
+        state = self.lexer.cached_state(editor, line - 1)
+        if state is None:
+            state = self.lexer.STATE_DEFAULT
+
+        snapshot = (self.lexer.modification_count, line, end, document_buffer.read_text(editor, start, end), state)
+        threading.Thread(target=self.tokenize_snapshot, args=snapshot, daemon=True).start()
+
+    def tokenize_snapshot(self, modification_count, line, end, text, state):
+        """Runs on the worker thread."""
+        result = self.lexer.tokenize(text, state)
+        try:
+            self.tokenized.emit((modification_count, line, end, result))
+        except RuntimeError:
+            pass # the styler was deleted while the snapshot was tokenized
+
+    def apply_snapshot(self, snapshot):
+        if self.cancelled:
+            return
+
+        modification_count, line, end, result = snapshot
+        if modification_count == self.lexer.modification_count:
+            self.lexer.apply_tokenized(line, *result)
+            self.extend_horizon(end)
+            self.progress.emit(end * 100 // max(self.editor.length(), 1))
+            self.snapshot_size = min(self.MAX_SNAPSHOT, self.snapshot_size * 2)
+        else:
+            # the document changed while the snapshot was tokenized, so it's dropped; smaller
+            # snapshots make it through between keystrokes
+            self.snapshot_size = max(self.MIN_SNAPSHOT, self.snapshot_size // 4)
+
+        self.tokenize_next_snapshot()
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+
+
+def write_backup(backup_file, data):
+    """Writes a backup through a temporary file that's renamed over the old one, so an
+    interrupted write leaves the previous backup as it was. Safe to run on a worker thread."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(backup_file), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, backup_file)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def lock_file(path, timeout=10):
+    """Holds a lock file for the duration, shared with other processes and windows. One left
+    behind by a crash is taken over once it's older than timeout seconds."""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.remove(path)
+                    continue
+            except OSError:
+                # released meanwhile
+                continue
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class BackupStore:
+    """Backups of open documents, kept as zlib compressed blobs named by the SHA-256 of their
+    contents, so tabs holding the same text share one blob and an unchanged document is
+    never written twice.
+
+    index.json maps each document (its full path, or the backup path of a new tab) to its
+    blob, so restoring and cleaning up only look at the index. Blobs are written first
+    (on any thread, with write_blob) and only then recorded on the main thread with set,
+    so the index never points at a half-written blob. Blobs nothing refers to any more are
+    deleted by collect, which must not run while blobs are being written.
+
+    Every window has a store over the same index, so save_index doesn't write out its own
+    view of it: under a lock file, it reads the index again and applies the changes made
+    since the last save, which keeps the other windows' entries. Blobs are only collected
+    once no window's entries refer to them, and not while they may still be on their way
+    into another window's index."""
+
+    BLOB_GRACE = 60 # seconds a blob is kept after it was last written, for other windows to record it
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock_path = os.path.join(directory, "index.lock")
+        self.blob_path = os.path.join(directory, "blobs")
+        self.journal_dir = os.path.join(directory, "journals")
+        os.makedirs(self.blob_path, exist_ok=True)
+        os.makedirs(self.journal_dir, exist_ok=True)
+
+        self.exists = os.path.exists(self.index_path)
+        self.entries = self.load_index() # document -> blob digest
+        self.references = Counter(self.entries.values())
+        # digests that lost a reference since the last collect, starting with any blob left
+        # over from before, such as one still in its grace period when the app quit
+        self.garbage = self.stored_digests() - set(self.references)
+        self.changes = {} # document -> digest, or None if removed, since the index was saved
+        self.dirty = False # whether the index changed since it was saved
+
+    def load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                return json.load(file).get("entries", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"failed to load backup index!: {e}")
+            return {}
+
+    def stored_digests(self):
+        try:
+            names = os.listdir(self.blob_path)
+        except OSError:
+            return set()
+        return {name[:-3] for name in names if name.endswith(".zz")}
+
+    def save_index(self):
+        """Writes this store's changes into the index, along with what the other windows
+        have written since, and takes those on."""
+        with lock_file(self.lock_path):
+            entries = self.merged_index()
+            data = json.dumps({"version": 1, "entries": entries}, indent=4).encode("utf-8")
+            write_backup(self.index_path, data)
+        references = Counter(entries.values())
+        # including blobs only another window's documents referred to
+        self.garbage.update(digest for digest in self.references if digest not in references)
+        self.entries = entries
+        self.references = references
+        self.changes.clear()
+        self.exists = True
+        self.dirty = False
+
+    def merged_index(self):
+        """The index as it is on disk, with the changes not saved yet applied."""
+        entries = self.load_index()
+        for key, digest in self.changes.items():
+            if digest is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = digest
+        return entries
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def blob_file(self, digest):
+        return os.path.join(self.blob_path, f"{digest}.zz")
+
+    def journal_path(self, key):
+        """The edit journal of a document, named after a hash of its full path so documents
+        with the same file name in different folders don't share one."""
+        name = hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(self.journal_dir, f"{name}.journal")
+
+    def write_blob(self, data):
+        """Stores data unless a blob with the same contents is already there. Returns its
+        digest, to record with set. Safe to run on a worker thread."""
+        digest = hashlib.sha256(data).hexdigest()
+        blob_file = self.blob_file(digest)
+        try:
+            # keeps another window's collect off it until it's recorded
+            os.utime(blob_file)
+        except FileNotFoundError:
+            write_backup(blob_file, zlib.compress(data, 1))
+        return digest
+
+    def read(self, key):
+        """Returns a document's backup, or None if it has none or its blob can't be read."""
+        digest = self.entries.get(key)
+        if digest is None:
+            return None
+        try:
+            with open(self.blob_file(digest), "rb") as file:
+                return zlib.decompress(file.read())
+        except (OSError, zlib.error) as e:
+            print(f"failed to read backup of {key}: {e}")
+            return None
+
+    def set(self, key, digest):
+        """Points a document at a blob. Returns whether that changed the index."""
+        old = self.entries.get(key)
+        if old == digest:
+            return False
+        self.entries[key] = digest
+        self.changes[key] = digest
+        self.references[digest] += 1
+        self.dirty = True
+        if old is not None:
+            self.release(old)
+        return True
+
+    def put(self, key, data):
+        """Writes and records a backup in one go. Returns whether that changed the index."""
+        return self.set(key, self.write_blob(data))
+
+    def remove(self, key):
+        """Forgets a document's backup. Returns whether it had one."""
+        digest = self.entries.pop(key, None)
+        if digest is None:
+            return False
+        self.changes[key] = None
+        self.dirty = True
+        self.release(digest)
+        return True
+
+    def release(self, digest):
+        """Drops a reference to a blob, leaving it for collect once nothing refers to it."""
+        self.references[digest] -= 1
+        if self.references[digest] <= 0:
+            del self.references[digest]
+            self.garbage.add(digest)
+
+    def discard(self, digest):
+        """Leaves a blob that was written but never recorded for collect."""
+        if digest not in self.references:
+            self.garbage.add(digest)
+
+    def collect(self):
+        """Deletes the blobs that lost their last reference, in this window and in the index.
+        Save the index first, so it never refers to a deleted blob."""
+        if not self.garbage:
+            return
+        kept = set()
+        with lock_file(self.lock_path):
+            referenced = set(self.merged_index().values())
+            for digest in self.garbage:
+                if digest in self.references or digest in referenced:
+                    # written again since, or another window's document has it too
+                    continue
+                blob_file = self.blob_file(digest)
+                try:
+                    if time.time() - os.path.getmtime(blob_file) < self.BLOB_GRACE:
+                        kept.add(digest)
+                        continue
+                    os.remove(blob_file)
+                except FileNotFoundError:
+                    pass
+        self.garbage = kept
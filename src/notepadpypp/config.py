@@ -1,5 +1,6 @@
 import os
 import json
+import tempfile
 
 def get_config_path():
     """Determines the configuration path, based on the OS"""
@@ -16,6 +17,12 @@ def get_config_path():
 
 CONFIG_PATH = get_config_path()
 
+
+def normalize_path(file_path):
+    """The form of a path files are looked up by, so one file reached through different
+    paths is found either way."""
+    return os.path.normcase(os.path.abspath(file_path))
+
 DEFAULT_CONFIG = {
     "debugMode": False, # Enable console debug mode
     "wordWrap": False, # Use word wrapping
@@ -25,6 +32,13 @@ DEFAULT_CONFIG = {
     "restoreFilesOnClose": True, # Restore files upon closing
     "openNewTabOnLastClosed": True, # When closing the last tab, open a new tab to replicate Notepad++ behavior
     "lockTabs": False, # Add option to lock tabs
+    "backgroundStyling": True, # Style what's on screen first and the rest of large documents in the background
+    "largeFileThreshold": 268435456, # Files bigger than this (in bytes) open in the read-only large file viewer
+    "fileWorkers": 4, # Threads used to read and write files when opening or saving many at once
+    "prefetchTabs": 1, # Restored tabs on each side of the current one to open while idle (0 opens them only when shown)
+    "hibernateAfter": 1800, # Seconds a tab can go unseen before its editor is freed until it's shown again (0 to never)
+    "hibernateBudget": 268435456, # Bytes of text kept in editors; past this the least recently shown tabs are freed (0 for no limit)
+    "journalCompactSize": 1048576, # Bytes of edits journaled since a document's last backup before a new backup is taken
     "useQtDialogs": True, # For some reason KDE native dialogs won't work, so I added this option. Might be removed in future releases if I can fix the bug
     "window_size": [800, 600], # Window size
     "window_position": [100, 100], # Window position
@@ -36,6 +50,7 @@ DEFAULT_CONFIG = {
         "font_color": "#000", # font color
         "font_size": 12 # font size
     },
+    "encoding_overrides": {}, # file path -> encoding picked with File > Reopen with Encoding
     "open_files": [] # open files
 }
 
@@ -43,6 +58,12 @@ class Config:
     def __init__(self, config_path):
         self.config_path = config_path 
         self.data = self.load_config()
+        # normalized file path -> its entry, in the order of open_files, which is only
+        # written back into the data when the config is flushed
+        self.open_file_index = self.index_open_files(self.data.get("open_files", []))
+        self.dirty = False # changed since it was last written
+        # called by save instead of writing right away, to coalesce saves into one flush
+        self.schedule_save = None
     
     def load_config(self):
         if os.path.exists(self.config_path):
@@ -55,8 +76,32 @@ class Config:
         return DEFAULT_CONFIG 
 
     def save(self):
-        with open(self.config_path, "w", encoding="utf-8") as file:
-            json.dump(self.data, file, indent=4)
+        """Marks the config as changed. It's written by flush, right away unless a
+        schedule_save has been set to flush it later."""
+        self.dirty = True
+        if self.schedule_save is None:
+            self.flush()
+        else:
+            self.schedule_save()
+
+    def flush(self):
+        """Writes the config if it changed, through a temporary file that's renamed over the
+        old one so an interrupted write can't leave it half written."""
+        if not self.dirty:
+            return
+        self.data["open_files"] = self.get_open_files()
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.config_path), prefix=".config", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self.data, file, indent=4)
+            os.replace(temp_path, self.config_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.dirty = False
     
     def get(self, key, default=None):
         return self.data.get(key, default)
@@ -64,33 +109,46 @@ class Config:
     def set(self, key, value):
         self.data[key] = value 
 
-    def add_open_file(self, file_path, is_modified=False, caret_position=(0, 0), lexer="None"):
-        """Adds/updates open files in open_files."""
-        for file_info in self.data["open_files"]:
-            if file_info["file_path"] == file_path:
-                file_info.update({
-                    "is_modified": is_modified,
-                    "caret_position": caret_position,
-                    "lexer": lexer
-                })
-                break
+    @staticmethod
+    def index_open_files(open_files):
+        return {normalize_path(file_info["file_path"]): file_info for file_info in open_files}
+
+    def get_open_file(self, file_path):
+        """Gets a file's entry in open_files, or None if it isn't open."""
+        return self.open_file_index.get(normalize_path(file_path))
+
+    def set_open_files(self, open_files):
+        """Replaces open_files."""
+        self.open_file_index = self.index_open_files(open_files)
+
+    def add_open_file(self, file_path, is_modified=False, caret_position=(0, 0), lexer="None", save=True):
+        """Adds/updates open files in open_files. With save=False the caller saves the config later."""
+        key = normalize_path(file_path)
+        file_info = self.open_file_index.get(key)
+        if file_info is not None:
+            file_info.update({
+                "is_modified": is_modified,
+                "caret_position": caret_position,
+                "lexer": lexer
+            })
         else:
-            self.data["open_files"].append({
+            file_info = {
                 "file_path": file_path,
                 "is_modified": is_modified,
                 "caret_position": caret_position,
                 "lexer": lexer
-            })
-        
-        self.save()
+            }
+            self.open_file_index[key] = file_info
+
+        if save:
+            self.save()
 
     def remove_open_file(self, file_path):
         """Removes files from open_files."""
-        self.data["open_files"] = [
-            file_info for file_info in self.data["open_files"] if file_info["file_path"] != file_path 
-        ]
+        if self.open_file_index.pop(normalize_path(file_path), None) is None:
+            return
         self.save()
 
     def get_open_files(self):
         """Gets list of open files."""
-        return self.data["open_files"]
\ No newline at end of file
+        return list(self.open_file_index.values())
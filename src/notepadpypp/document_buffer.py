@@ -0,0 +1,63 @@
+import ctypes
+
+from PyQt6.Qsci import QsciScintilla
+
+# SendScintilla returns a C long, which only holds a pointer where longs are 64-bit (not on
+# Windows). Elsewhere ranges are sliced out of SCI_GETCHARACTERPOINTER, which has to move
+# Scintilla's gap to the end of the document first.
+_LONG_HOLDS_POINTER = ctypes.sizeof(ctypes.c_long) == ctypes.sizeof(ctypes.c_void_p)
+
+
+def view(editor, start=0, end=None):
+    """Returns a read-only memoryview over the editor's UTF-8 bytes from start to end, without
+    copying them. The view points into Scintilla's buffer and is only valid until the document
+    is next modified, so read what's needed and let it go."""
+    length = editor.length()
+    end = length if end is None else max(0, min(end, length))
+    start = max(0, min(start, end))
+    size = end - start
+    if size == 0:
+        return memoryview(b"")
+
+    if _LONG_HOLDS_POINTER:
+        address = editor.SendScintilla(QsciScintilla.SCI_GETRANGEPOINTER, start, size)
+        return memoryview((ctypes.c_ubyte * size).from_address(address)).cast("B").toreadonly()
+
+    pointer = editor.SendScintillaPtrResult(QsciScintilla.SCI_GETCHARACTERPOINTER)
+    pointer.setsize(length)
+    pointer.setwriteable(False)
+    return memoryview(pointer)[start:end]
+
+
+def read_bytes(editor, start=0, end=None):
+    """Returns a copy of the editor's UTF-8 bytes from start to end."""
+    return bytes(view(editor, start, end))
+
+
+def read_text(editor, start=0, end=None):
+    """Decodes the editor's text from start to end (byte positions). Bytes that aren't valid
+    UTF-8 decode to one surrogate character each, so character offsets into the text map
+    back onto document positions one for one, like Scintilla counts them."""
+    return str(view(editor, start, end), "utf-8", "surrogateescape")
+
+
+def line_text(editor, line):
+    """Decodes one line of the editor's text, including its line end."""
+    start = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+    end = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line + 1)
+    if start < 0:
+        return ""
+    return read_text(editor, start, editor.length() if end < 0 else end)
+
+
+def position_after(editor, position, characters):
+    """Returns the document position a number of characters of decoded text after position."""
+    if characters == 0:
+        return position
+    # Scintilla answers 0 for positions past the end of the document
+    return editor.SendScintilla(QsciScintilla.SCI_POSITIONRELATIVE, position, characters) or editor.length()
+
+
+def character_offset(editor, position):
+    """Returns how many characters of decoded text come before a document position."""
+    return editor.SendScintilla(QsciScintilla.SCI_COUNTCHARACTERS, 0, position)
@@ -0,0 +1,156 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+
+MAGIC = b"NPJ1"
+HEADER = struct.Struct("<4sQI") # magic, length and CRC-32 of the backup it applies to
+RECORD = struct.Struct("<cQQ") # b"I" or b"D", byte position, byte length (inserts are followed by the text)
+
+
+def header(base):
+    return HEADER.pack(MAGIC, len(base), zlib.crc32(base))
+
+
+def replay(path, base):
+    """Returns base (the backup's contents) with the edits in the journal at path applied, or
+    None if there are none to apply: no journal, an empty one, or one for another version of
+    the backup (left by a crash while the two were replaced). A record cut off by a crash
+    ends the replay there."""
+    try:
+        with open(path, "rb") as file:
+            journal = file.read()
+    except OSError:
+        return None
+
+    document = bytearray(base)
+
+    if len(journal) < HEADER.size or journal[:HEADER.size] != header(document):
+        return None
+
+    offset = HEADER.size
+    while offset + RECORD.size <= len(journal):
+        kind, position, length = RECORD.unpack_from(journal, offset)
+        offset += RECORD.size
+        if kind == b"I":
+            if offset + length > len(journal):
+                break
+            document[position:position] = journal[offset:offset + length]
+            offset += length
+        else:
+            del document[position:position + length]
+
+    if offset == HEADER.size:
+        return None
+    return bytes(document)
+
+
+class EditJournal:
+    """The inserts and deletes made to a document since its last backup, kept on the main
+    thread until JournalWriter appends them to the document's journal file.
+
+    The journal only means something on top of the backup it was started from (its base),
+    so nothing is written until the document has one; rebase starts the journal over on a
+    newer backup, keeping the edits made since that backup was taken."""
+
+    def __init__(self, path):
+        self.path = path
+        self.base_generation = None
+        self.records = [] # (generation, record) since the base
+        self.unflushed = 0 # index of the first record not handed to the writer yet
+        self.size = 0 # bytes of records since the base
+
+    def insert(self, generation, position, text):
+        self.add(generation, RECORD.pack(b"I", position, len(text)) + text)
+
+    def delete(self, generation, position, length):
+        self.add(generation, RECORD.pack(b"D", position, length))
+
+    def add(self, generation, record):
+        self.records.append((generation, record))
+        self.size += len(record)
+
+    def take_unflushed(self):
+        """Returns the records to append to the journal file, once it has a base."""
+        if self.base_generation is None or self.unflushed == len(self.records):
+            return b""
+        data = b"".join(record for _, record in self.records[self.unflushed:])
+        self.unflushed = len(self.records)
+        return data
+
+    def rebase(self, generation):
+        """Makes a backup taken at generation the journal's base. Returns the records made
+        after it, to write after the new header."""
+        self.records = [(made_at, record) for made_at, record in self.records if made_at > generation]
+        self.base_generation = generation
+        self.unflushed = len(self.records)
+        self.size = sum(len(record) for _, record in self.records)
+        return b"".join(record for _, record in self.records)
+
+    def reset(self):
+        """Forgets everything, for when the document no longer has a backup."""
+        self.base_generation = None
+        self.records = []
+        self.unflushed = 0
+        self.size = 0
+
+
+class JournalWriter:
+    """Writes journal files on a thread of its own, in the order the work was handed to it."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="journal writer", daemon=True)
+        self.thread.start()
+
+    def append(self, path, data):
+        self.queue.put((self.write_append, path, data))
+
+    def rewrite(self, path, base, data):
+        """Starts the journal over on base (the backup's contents), with data after the header."""
+        self.queue.put((self.write_new, path, base, data))
+
+    def remove(self, path):
+        self.queue.put((self.write_remove, path))
+
+    def wait(self):
+        """Blocks until everything handed over so far is written."""
+        self.queue.join()
+
+    def run(self):
+        while True:
+            work, *args = self.queue.get()
+            try:
+                work(*args)
+            except OSError as e:
+                print(f"Failed to write edit journal {args[0]}: {e}")
+            finally:
+                self.queue.task_done()
+
+    @staticmethod
+    def write_append(path, data):
+        if not os.path.exists(path):
+            # removed since, or never started
+            return
+        with open(path, "ab") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def write_new(path, base, data):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(header(base))
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def write_remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,140 @@
+import codecs
+import json
+import os
+import threading
+
+from config import CONFIG_PATH
+
+ENCODING_CACHE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), "encoding_cache.json")
+
+# longest BOMs first, the UTF-32 LE BOM starts with the UTF-16 LE one
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf_32"),
+    (codecs.BOM_UTF32_BE, "utf_32"),
+    (codecs.BOM_UTF8, "utf_8_sig"),
+    (codecs.BOM_UTF16_LE, "utf_16"),
+    (codecs.BOM_UTF16_BE, "utf_16"),
+]
+
+
+class EncodingDetector:
+    """Works out the encoding of files from a few samples instead of their whole contents,
+    and remembers the answer for each file until it changes on disk.
+
+    A BOM settles it straight away. Otherwise a window from the head, the middle and the tail
+    of the file is checked: if all of them are valid UTF-8 the file is taken to be UTF-8,
+    and only if one isn't does charset_normalizer look at the samples. Callers that find
+    the answer doesn't decode the whole file call detect_full. Files can be detected from
+    several threads at once."""
+
+    SAMPLE_SIZE = 0x10000 # bytes per window
+    MAX_ENTRIES = 1000 # files remembered in the cache
+
+    def __init__(self, cache_path=ENCODING_CACHE_PATH):
+        self.cache_path = cache_path
+        self.cache = self.read_cache() # path -> [size, mtime_ns, encoding]
+        self.lock = threading.Lock() # held while the cache is changed and written
+
+    def detect(self, file_path):
+        """Returns the encoding of a file, or None if it looks like binary data."""
+        key = self.file_key(file_path)
+        cached = self.cache.get(file_path)
+        if cached is not None and cached[:2] == key:
+            return cached[2]
+
+        with open(file_path, "rb") as file:
+            encoding = self.detect_samples(self.read_samples(file, key[0]))
+
+        self.remember(file_path, key, encoding)
+        return encoding
+
+    def detect_full(self, file_path, data):
+        """Detects the encoding from a file's whole contents, for files whose sampled encoding
+        turned out not to decode all of it."""
+        from charset_normalizer import from_bytes
+
+        detected = from_bytes(data).best()
+        encoding = detected.encoding if detected else None
+        self.remember(file_path, self.file_key(file_path), encoding)
+        return encoding
+
+    def forget(self, file_path):
+        with self.lock:
+            if self.cache.pop(file_path, None) is not None:
+                self.write_cache()
+
+    def file_key(self, file_path):
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def read_samples(self, file, size):
+        """Returns the windows to look at, as (bytes, starts mid-file, ends mid-file)."""
+        if size <= 3 * self.SAMPLE_SIZE:
+            return [(file.read(), False, False)]
+
+        samples = []
+        # window starts stay 4-byte aligned so UTF-16/32 text isn't read from half a character
+        for start in (0, (size // 2 - self.SAMPLE_SIZE // 2) & ~3, (size - self.SAMPLE_SIZE) & ~3):
+            file.seek(start)
+            window = file.read(self.SAMPLE_SIZE)
+            samples.append((window, start > 0, start + len(window) < size))
+        return samples
+
+    def detect_samples(self, samples):
+        head = samples[0][0]
+        for bom, encoding in BOMS:
+            if head.startswith(bom):
+                return encoding
+
+        if all(self.is_utf8(*sample) for sample in samples):
+            return "utf_8"
+
+        from charset_normalizer import from_bytes
+
+        detected = from_bytes(b"".join(window for window, _, _ in samples)).best()
+        return detected.encoding if detected else None
+
+    @staticmethod
+    def is_utf8(window, starts_mid_file, ends_mid_file):
+        if starts_mid_file:
+            # skip the tail of a character cut off by the window start
+            skip = 0
+            while skip < 3 and skip < len(window) and 0x80 <= window[skip] < 0xC0:
+                skip += 1
+            window = window[skip:]
+        try:
+            codecs.getincrementaldecoder("utf_8")().decode(window, final=not ends_mid_file)
+        except UnicodeDecodeError:
+            return False
+        return b"\0" not in window
+
+    def remember(self, file_path, key, encoding):
+        with self.lock:
+            self.cache.pop(file_path, None)
+            self.cache[file_path] = key + [encoding]
+            while len(self.cache) > self.MAX_ENTRIES:
+                del self.cache[next(iter(self.cache))]
+            self.write_cache()
+
+    def read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable encoding cache: {e}")
+            return {}
+
+        if not isinstance(cache, dict):
+            return {}
+        return {path: entry for path, entry in cache.items() if isinstance(entry, list) and len(entry) == 3}
+
+    def write_cache(self):
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(self.cache, file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Failed to write encoding cache: {e}")
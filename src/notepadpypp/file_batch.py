@@ -0,0 +1,116 @@
+import codecs
+import os
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+def read_file(file_path, encoding_detector, override=None, read_limit=0x400000):
+    """Detects a file's encoding and, if it's no bigger than read_limit, reads and decodes it.
+    Runs on a worker thread.
+
+    Returns (encoding, text) where text is the file as UTF-8, or None if the file is too big
+    to read in one go and has to be loaded a chunk at a time. encoding is None for binary files."""
+    encoding = override or encoding_detector.detect(file_path)
+    if encoding is None or os.path.getsize(file_path) > read_limit:
+        return encoding, None
+
+    with open(file_path, "rb") as file:
+        data = file.read()
+    try:
+        text = codecs.decode(data, encoding, "replace" if override else "strict")
+    except UnicodeDecodeError:
+        # the sampled encoding doesn't hold for the whole file
+        encoding = encoding_detector.detect_full(file_path, data)
+        if encoding is None:
+            return None, None
+        text = codecs.decode(data, encoding)
+    return encoding, text.encode("utf-8")
+
+
+class FileBatch(QObject):
+    """Keeps track of work on many files at once, such as opening a drop of files or Save All.
+
+    Work given to run goes to a thread pool and its result is handed back on the main thread
+    once that file is done, as many at a time as fit in the time budget so the UI keeps
+    running while a lot of files come in at once. Work done elsewhere (like a FileSaver) is
+    counted with add and complete. progress is emitted as files complete, and finished once
+    close has been called and every file is done, with whatever went wrong in errors."""
+
+    progress = pyqtSignal(int, int) # files done, files in the batch
+    finished = pyqtSignal()
+    work_done = pyqtSignal(str, object, object)
+
+    def __init__(self, executor, time_budget_ms=15, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.time_budget = time_budget_ms / 1000
+        self.total = 0
+        self.completed = 0
+        self.errors = [] # (file path, exception or message)
+        self.closed = False
+        self.pending = deque() # work done on the pool, waiting for its on_done
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.apply_pending)
+        self.work_done.connect(self.queue)
+
+    def add(self):
+        self.total += 1
+
+    def complete(self, file_path, error=None):
+        self.completed += 1
+        if error is not None:
+            self.errors.append((file_path, error))
+        self.progress.emit(self.completed, self.total)
+        self.check_finished()
+
+    def close(self):
+        """Marks the batch as having all its files, so it can finish."""
+        self.closed = True
+        self.check_finished()
+
+    def check_finished(self):
+        if self.closed and self.completed == self.total:
+            self.finished.emit()
+
+    def run(self, file_path, work, on_done):
+        """Runs work(file_path) on the thread pool, then on_done(file_path, result) on the
+        main thread. An exception from either counts as the file's error."""
+        self.add()
+        future = self.executor.submit(work, file_path)
+
+        def done(future):
+            try:
+                self.work_done.emit(file_path, future, on_done)
+            except RuntimeError:
+                # the window was closed in the meantime
+                pass
+
+        future.add_done_callback(done)
+
+    def queue(self, file_path, future, on_done):
+        self.pending.append((file_path, future, on_done))
+        self.timer.start()
+
+    def apply_pending(self):
+        started = time.perf_counter()
+        while self.pending and time.perf_counter() - started < self.time_budget:
+            file_path, future, on_done = self.pending.popleft()
+            try:
+                on_done(file_path, future.result())
+            except Exception as e:
+                self.complete(file_path, e)
+            else:
+                self.complete(file_path)
+        if not self.pending:
+            self.timer.stop()
+
+    def error_report(self, limit=20):
+        """Returns the errors as one line per file, at most limit of them."""
+        lines = [f"{file_path}: {error}" for file_path, error in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"...and {len(self.errors) - limit} more")
+        return "\n".join(lines)
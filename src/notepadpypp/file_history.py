@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+
+from config import CONFIG_PATH, normalize_path
+
+FILE_HISTORY_PATH = os.path.join(os.path.dirname(CONFIG_PATH), "file_history.json")
+
+
+class FileHistory:
+    """How each recently used file was last viewed (caret, scroll position, folds and lexer),
+    so opening it again puts it back the way it was left, even long after it was closed.
+
+    Entries are kept in a dict by normalized path, least recently used first, and only the
+    most recent MAX_ENTRIES are kept. Like the config, save only marks the history as changed
+    and it's written by flush, through schedule_save if one has been set."""
+
+    MAX_ENTRIES = 5000 # files remembered
+
+    def __init__(self, history_path=FILE_HISTORY_PATH):
+        self.history_path = history_path
+        self.entries = self.read_history() # normalized path -> view state
+        self.dirty = False # changed since it was last written
+        self.schedule_save = None
+
+    def get(self, file_path):
+        """Returns the view state last recorded for a file, or None."""
+        return self.entries.get(normalize_path(file_path))
+
+    def record(self, file_path, state):
+        key = normalize_path(file_path)
+        self.entries.pop(key, None)
+        self.entries[key] = state
+        while len(self.entries) > self.MAX_ENTRIES:
+            del self.entries[next(iter(self.entries))]
+        self.save()
+
+    def read_history(self):
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as file:
+                history = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable file history: {e}")
+            return {}
+
+        if not isinstance(history, dict):
+            return {}
+        return {path: state for path, state in history.items() if isinstance(state, dict)}
+
+    def save(self):
+        self.dirty = True
+        if self.schedule_save is None:
+            self.flush()
+        else:
+            self.schedule_save()
+
+    def flush(self):
+        if not self.dirty:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.history_path), prefix=".file_history", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file)
+            os.replace(temp_path, self.history_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.dirty = False
@@ -0,0 +1,231 @@
+import codecs
+import os
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.Qsci import QsciScintilla
+
+
+def load_text(editor, data):
+    """Puts a whole file, already decoded to UTF-8, in an editor the way FileLoader leaves it:
+    not modified, with nothing to undo."""
+    editor.blockSignals(True)
+    editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+    event_mask = editor.SendScintilla(QsciScintilla.SCI_GETMODEVENTMASK)
+    editor.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, 0)
+    try:
+        editor.SendScintilla(QsciScintilla.SCI_CLEARALL)
+        if data:
+            editor.SendScintilla(QsciScintilla.SCI_APPENDTEXT, len(data), data)
+    finally:
+        editor.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, event_mask)
+        editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+        editor.blockSignals(False)
+    editor.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+    editor.setModified(False)
+
+
+def mark_modified(editor):
+    """Marks a document as modified without leaving anything to undo. Scintilla's only
+    notion of modified is not being at the save point, which setModified(True) can't change."""
+    editor.SendScintilla(QsciScintilla.SCI_INSERTTEXT, 0, b" ")
+    editor.SendScintilla(QsciScintilla.SCI_DELETERANGE, 0, 1)
+    editor.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+
+
+class FileLoader(QObject):
+    """Loads a file into an editor a chunk at a time while the event loop is idle.
+
+    Each chunk is decoded incrementally and appended to the Scintilla document, so no more
+    than a chunk of the file is held outside Scintilla at any time and the UI keeps running
+    between chunks. The document is read-only until the load finishes, and undo collection
+    is off so the load itself can't be undone.
+
+    If the file turns out not to decode in the given encoding, the encoding_detector (when
+    given) detects it again from the whole file on a worker thread, on executor's thread pool
+    if given, and the load starts over, or emits binary instead when the file isn't text.
+    errors="replace" loads it regardless."""
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal()
+    failed = pyqtSignal(str)
+    binary = pyqtSignal()
+    detected = pyqtSignal(object, object) # encoding or None, error message or None
+
+    CHUNK_SIZE = 0x100000 # bytes read from the file at a time
+
+    def __init__(self, editor, file_path, encoding, encoding_detector=None, errors="strict", time_budget_ms=15, executor=None, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.file_path = file_path
+        self.encoding = encoding
+        self.encoding_detector = encoding_detector
+        self.executor = executor
+        self.errors = errors
+        self.time_budget = time_budget_ms / 1000
+        self.file = None
+        self.size = 0
+        self.loaded = 0
+        self.active = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.load_next_chunks)
+        self.detected.connect(self.resume)
+
+    def start(self):
+        try:
+            self.file = open(self.file_path, "rb")
+            self.size = self.file.seek(0, 2)
+        except OSError as e:
+            self.fail(str(e))
+            return
+
+        self.active = True
+        self.editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+        self.restart(self.encoding)
+        self.editor.setReadOnly(True)
+        self.timer.start()
+        # small files are in before the tab is first painted
+        self.load_next_chunks()
+
+    def restart(self, encoding):
+        """(Re)starts loading from the top of the file in the given encoding."""
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder(encoding)(self.errors)
+        self.file.seek(0)
+        self.loaded = 0
+
+        editor = self.editor
+        editor.setReadOnly(False)
+        editor.blockSignals(True)
+        event_mask = editor.SendScintilla(QsciScintilla.SCI_GETMODEVENTMASK)
+        editor.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, 0)
+        try:
+            editor.SendScintilla(QsciScintilla.SCI_CLEARALL)
+        finally:
+            editor.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, event_mask)
+            editor.blockSignals(False)
+        # close enough to the size of the text in UTF-8
+        editor.SendScintilla(QsciScintilla.SCI_ALLOCATE, self.size)
+
+    def cancel(self):
+        """Stops loading and leaves the document as far as it got."""
+        self.active = False
+        self.timer.stop()
+        self.close_file()
+
+    def load_next_chunks(self):
+        started = time.perf_counter()
+        editor = self.editor
+        editor.setReadOnly(False)
+        editor.blockSignals(True)
+        # modification notifications cost time in proportion to the document on every append
+        event_mask = editor.SendScintilla(QsciScintilla.SCI_GETMODEVENTMASK)
+        editor.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, 0)
+        final = False
+        error = None
+        redetect = False
+
+        try:
+            while not final and time.perf_counter() - started < self.time_budget:
+                chunk = self.file.read(self.CHUNK_SIZE)
+                at_end = len(chunk) < self.CHUNK_SIZE
+
+                data = self.decoder.decode(chunk, at_end).encode("utf-8")
+                self.loaded += len(chunk)
+                del chunk
+
+                if data:
+                    editor.SendScintilla(QsciScintilla.SCI_APPENDTEXT, len(data), data)
+                del data
+                final = at_end
+
+        except UnicodeDecodeError as e:
+            if self.encoding_detector is None:
+                error = f"The file is not valid {self.encoding}: {e}"
+            else:
+                # the sampled encoding doesn't hold for the whole file
+                redetect = True
+
+        except OSError as e:
+            error = str(e)
+
+        finally:
+            editor.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, event_mask)
+            editor.blockSignals(False)
+            if self.active:
+                editor.setReadOnly(True)
+
+        if error is not None:
+            self.fail(error)
+        elif redetect:
+            self.detect_encoding()
+        elif final:
+            self.finish()
+        else:
+            self.progress.emit(self.loaded * 100 // max(self.size, 1))
+
+    def detect_encoding(self):
+        """Pauses the load while the whole file is read and its encoding detected again on a
+        worker thread. The document stays read-only meanwhile and the load resumes once
+        detected comes back on the main thread."""
+        self.timer.stop()
+        detector = self.encoding_detector
+        self.encoding_detector = None
+
+        def run():
+            encoding = error = None
+            try:
+                with open(self.file_path, "rb") as file:
+                    encoding = detector.detect_full(self.file_path, file.read())
+            except OSError as e:
+                error = str(e)
+            try:
+                self.detected.emit(encoding, error)
+            except RuntimeError:
+                # the window was closed while detecting
+                pass
+
+        if self.executor is not None:
+            self.executor.submit(run)
+        else:
+            threading.Thread(target=run, name=f"detect {os.path.basename(self.file_path)}").start()
+
+    def resume(self, encoding, error):
+        if not self.active:
+            # cancelled while detecting
+            return
+        if error is not None:
+            self.fail(error)
+        elif encoding is None:
+            self.cancel()
+            self.binary.emit()
+        else:
+            self.restart(encoding)
+            self.editor.setReadOnly(True)
+            self.timer.start()
+
+    def finish(self):
+        self.active = False
+        self.timer.stop()
+        self.close_file()
+
+        editor = self.editor
+        editor.setReadOnly(False)
+        editor.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+        editor.setModified(False)
+
+        self.progress.emit(100)
+        self.finished.emit()
+
+    def fail(self, message):
+        self.cancel()
+        self.failed.emit(message)
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,130 @@
+import codecs
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import document_buffer
+
+# new files get the permissions open() would have given them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class FileSaver(QObject):
+    """Saves a snapshot of a document on a worker thread.
+
+    The text is encoded a chunk at a time in the file's encoding and written to a temporary
+    file next to the target, which is synced to disk and then renamed over it, so the file is
+    never left half written. Line endings are written as they are in the document, which keeps
+    the ones the file was loaded with.
+
+    finished or failed is emitted on the main thread once the save is done. The snapshot
+    is let go of once it's written, keeping only its length and digest, which is_current
+    compares with the document afterwards, as it may have been edited in the meantime."""
+
+    finished = pyqtSignal()
+    failed = pyqtSignal(object)
+
+    CHUNK_SIZE = 0x100000 # bytes of the snapshot encoded at a time
+
+    def __init__(self, editor, file_path, encoding="utf_8", parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.file_path = file_path
+        self.encoding = encoding or "utf_8"
+        self.snapshot = document_buffer.read_bytes(editor)
+        self.length = len(self.snapshot)
+        self.digest = None
+        self.thread = None
+
+    def start(self, executor=None):
+        """Starts saving on a thread of its own, or on executor's thread pool if given."""
+        if executor is not None:
+            executor.submit(self.run)
+            return
+        self.thread = threading.Thread(target=self.run, name=f"save {os.path.basename(self.file_path)}")
+        self.thread.start()
+
+    def is_current(self):
+        """Whether the document still holds what was saved."""
+        text = document_buffer.view(self.editor)
+        return len(text) == self.length and hashlib.sha256(text).digest() == self.digest
+
+    def run(self):
+        error = None
+        try:
+            self.save()
+            self.digest = hashlib.sha256(self.snapshot).digest()
+        except (OSError, UnicodeError) as e:
+            error = e
+        self.snapshot = None
+
+        try:
+            if error is None:
+                self.finished.emit()
+            else:
+                self.failed.emit(error)
+        except RuntimeError:
+            # the window was closed while saving
+            pass
+
+    def save(self):
+        # replace what a symlink points to, not the link
+        target = os.path.realpath(self.file_path)
+        directory = os.path.dirname(target)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                self.write(file)
+                file.flush()
+                os.fsync(file.fileno())
+            self.copy_permissions(target, temp_path)
+            os.replace(temp_path, target)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        if os.name != "nt":
+            # the rename itself only survives a crash once the directory is synced
+            try:
+                directory_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(directory_fd)
+                finally:
+                    os.close(directory_fd)
+            except OSError:
+                pass
+
+    def write(self, file):
+        if codecs.lookup(self.encoding).name == "utf-8":
+            file.write(self.snapshot)
+            return
+
+        decoder = codecs.getincrementaldecoder("utf_8")("surrogateescape")
+        encoder = codecs.getincrementalencoder(self.encoding)()
+        snapshot = memoryview(self.snapshot)
+        for start in range(0, len(snapshot), self.CHUNK_SIZE):
+            file.write(encoder.encode(decoder.decode(snapshot[start:start + self.CHUNK_SIZE])))
+        file.write(encoder.encode(decoder.decode(b"", True), True))
+
+    @staticmethod
+    def copy_permissions(target, temp_path):
+        try:
+            info = os.stat(target)
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+            return
+
+        os.chmod(temp_path, stat.S_IMODE(info.st_mode))
+        if hasattr(os, "chown"):
+            try:
+                os.chown(temp_path, info.st_uid, info.st_gid)
+            except OSError:
+                pass
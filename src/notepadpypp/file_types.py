@@ -1,154 +1,191 @@
-from PyQt6.Qsci import (
-    QsciLexerPython, QsciLexerJava, QsciLexerJavaScript, QsciLexerLua, 
-    QsciLexerHTML, QsciLexerJSON, QsciLexerCSS, QsciLexerCSharp, 
-    QsciLexerBash, QsciLexerBatch, QsciLexerCMake, QsciLexerAsm, 
-    QsciLexerCoffeeScript, QsciLexerCPP, QsciLexerD, QsciLexerDiff, 
-    QsciLexerFortran, QsciLexerFortran77, QsciLexerMakefile, 
-    QsciLexerMarkdown, QsciLexerMASM, QsciLexerOctave, QsciLexerPascal, 
-    QsciLexerPerl, QsciLexerPostScript, QsciLexerRuby, QsciLexerMatlab, 
-    QsciLexerXML, QsciLexerYAML
-)
-
-from generic_lexer import GenericLexer
-import json
-import os
+import importlib
+from collections.abc import Mapping
+
+from lexer_registry import LexerRegistry
+
+
+class LanguageRegistry:
+    """Every language's name, file extensions and the import path of its lexer class.
+
+    Nothing is imported up front: a built-in QsciLexer class is imported, and a JSON-defined
+    language gets its GenericLexer subclass built, the first time the language is used."""
+
+    def __init__(self):
+        self.languages = {} # language name -> "module.Class", or None for JSON-defined languages
+        self.extensions = {} # extension -> language name
+        self._classes = {}
+
+    def register(self, name, path, extensions=()):
+        self.languages[name] = path
+        self._classes.pop(name, None)
+        for ext in extensions:
+            self.extensions[ext] = name
+
+    def lexer_class(self, name):
+        """Returns the lexer class of a language, importing it on first use, or None."""
+        lexer_class = self._classes.get(name)
+        if lexer_class is None and name in self.languages:
+            path = self.languages[name]
+            if path is None:
+                lexer_class = make_generic_lexer_class(name)
+            else:
+                module_name, class_name = path.rsplit(".", 1)
+                lexer_class = getattr(importlib.import_module(module_name), class_name)
+            self._classes[name] = lexer_class
+        return lexer_class
+
+    def language_for_file(self, file_name):
+        for ext, language in self.extensions.items():
+            if file_name.endswith(ext):
+                return language
+        return None
+
+
+class LazyLexerMap(Mapping):
+    """Read-only view of a registry table that resolves to lexer classes, importing only the
+    ones that are looked up. Keys are language names, or extensions for by_extension."""
+
+    def __init__(self, table, by_extension=False):
+        self.table = table
+        self.by_extension = by_extension
+
+    def __getitem__(self, key):
+        language = self.table[key] if self.by_extension else key
+        if language not in LANGUAGE_REGISTRY.languages:
+            raise KeyError(key)
+        return LANGUAGE_REGISTRY.lexer_class(language)
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+def make_generic_lexer_class(name):
+    from generic_lexer import GenericLexer
+
+    class CustomGenericLexer(GenericLexer):
+        def __init__(self, parent=None):
+            # the config is only unpickled from the registry once the language is used
+            super().__init__(parent, lang_name=name, config=LEXER_REGISTRY.get_config(name))
+    CustomGenericLexer.__name__ = f"{name}Lexer"
+    return CustomGenericLexer
 
 
 def load_generic_lexers():
-    """Load all *_lang.json files from the lexer directory."""
-    lexer_dir = os.path.join(os.path.dirname(__file__), "lexer")
-    generic_lexers = {}
-    
-    if not os.path.exists(lexer_dir):
-        return generic_lexers
-    
-    for filename in os.listdir(lexer_dir):
-        if filename.endswith("_lang.json"):
-            filepath = os.path.join(lexer_dir, filename)
-            try:
-                with open(filepath, "r") as f:
-                    config = json.load(f)
-                    lang_name = config.get("name", filename.replace("_lang.json", ""))
-                    
-                    def make_lexer_class(cfg, name):
-                        class CustomGenericLexer(GenericLexer):
-                            def __init__(self, parent=None):
-                                super().__init__(parent, lang_name=name, config=cfg)
-                        CustomGenericLexer.__name__ = f"{name}Lexer"
-                        return CustomGenericLexer
-                    
-                    lexer_class = make_lexer_class(config, lang_name)
-                    generic_lexers[lang_name] = {
-                        "class": lexer_class,
-                        "extensions": config.get("extensions", []),
-                        "config": config
-                    }
-            except Exception as e:
-                print(f"Failed to load generic lexer {filename}: {e}")
-    
-    return generic_lexers
-
-GENERIC_LEXERS = load_generic_lexers()
-
-DEFAULT_LEXER_TYPES = {
-    ".asm": QsciLexerAsm,
-    ".bat": QsciLexerBatch,
+    """Registers the *_lang.json languages from the lexer directory, through the registry cache."""
+    for lang_name in LEXER_REGISTRY.languages:
+        LANGUAGE_REGISTRY.register(lang_name, None, LEXER_REGISTRY.get_extensions(lang_name))
+
+
+BUILTIN_EXTENSIONS = {
+    ".asm": "Assembly (x86)",
+    ".bat": "Batch",
     # TODO: convert this
-    #".b": BrainfuckLexer,
-    #".bf": BrainfuckLexer,
-    ".cmake": QsciLexerCMake,
-    ".cmd": QsciLexerBatch,
-    ".C": QsciLexerCPP,
-    ".cc": QsciLexerCPP,
-    ".cpp": QsciLexerCPP,
-    ".cxx": QsciLexerCPP,
-    ".c++": QsciLexerCPP,
-    ".h": QsciLexerCPP,
-    ".H": QsciLexerCPP,
-    ".hh": QsciLexerCPP,
-    ".hpp": QsciLexerCPP,
-    ".hxx": QsciLexerCPP,
-    ".h++": QsciLexerCPP,
-    ".cppm": QsciLexerCPP,
-    ".ixx": QsciLexerCPP,
-    ".coffee": QsciLexerCoffeeScript,
-    ".litcoffee": QsciLexerCoffeeScript,
-    ".css": QsciLexerCSS,
-    ".cs": QsciLexerCSharp,
-    ".d": QsciLexerD,
-    ".diff": QsciLexerDiff,
-    ".patch": QsciLexerDiff,
-    ".f90": QsciLexerFortran,
-    ".f": QsciLexerFortran,
-    ".for": QsciLexerFortran,
-    ".f77": QsciLexerFortran77,
-    ".htm": QsciLexerHTML,
-    ".html": QsciLexerHTML,
-    ".java": QsciLexerJava,
-    ".js": QsciLexerJavaScript,
-    ".json": QsciLexerJSON,
-    ".makefile": QsciLexerMakefile,
-    ".md": QsciLexerMarkdown,
-    ".m": QsciLexerMatlab,
-    ".p": QsciLexerMatlab,
-    ".lua": QsciLexerLua,
-    ".pas": QsciLexerPascal,
-    ".plx": QsciLexerPerl,
-    ".pls": QsciLexerPerl,
-    ".pl": QsciLexerPerl,
-    ".pm": QsciLexerPerl,
-    ".xs": QsciLexerPerl,
-    ".t": QsciLexerPerl,
-    ".pod": QsciLexerPerl,
-    ".cgi": QsciLexerPerl,
-    ".psgi": QsciLexerPerl,
-    ".py": QsciLexerPython,
-    ".ps": QsciLexerPostScript,
-    ".xml": QsciLexerXML,
-    ".yaml": QsciLexerYAML
+    #".b": "Brainfuck",
+    #".bf": "Brainfuck",
+    ".cmake": "CMake",
+    ".cmd": "Batch",
+    ".C": "C++",
+    ".cc": "C++",
+    ".cpp": "C++",
+    ".cxx": "C++",
+    ".c++": "C++",
+    ".h": "C++",
+    ".H": "C++",
+    ".hh": "C++",
+    ".hpp": "C++",
+    ".hxx": "C++",
+    ".h++": "C++",
+    ".cppm": "C++",
+    ".ixx": "C++",
+    ".coffee": "CoffeeScript",
+    ".litcoffee": "CoffeeScript",
+    ".css": "CSS",
+    ".cs": "C#",
+    ".d": "D",
+    ".diff": "Diff",
+    ".patch": "Diff",
+    ".f90": "Fortran",
+    ".f": "Fortran",
+    ".for": "Fortran",
+    ".f77": "Fortran '77",
+    ".htm": "HTML",
+    ".html": "HTML",
+    ".java": "Java",
+    ".js": "JavaScript",
+    ".json": "JSON",
+    ".makefile": "Makefile",
+    ".md": "Markdown",
+    ".m": "Matlab",
+    ".p": "Matlab",
+    ".lua": "Lua",
+    ".pas": "Pascal",
+    ".plx": "Perl",
+    ".pls": "Perl",
+    ".pl": "Perl",
+    ".pm": "Perl",
+    ".xs": "Perl",
+    ".t": "Perl",
+    ".pod": "Perl",
+    ".cgi": "Perl",
+    ".psgi": "Perl",
+    ".py": "Python",
+    ".ps": "PostScript",
+    ".xml": "XML",
+    ".yaml": "YAML"
 }
 
-for lang_name, lexer_info in GENERIC_LEXERS.items():
-    for ext in lexer_info["extensions"]:
-        DEFAULT_LEXER_TYPES[ext] = lexer_info["class"]
-
-DEFAULT_LANGUAGES = {
-    "Assembly (x86)": QsciLexerAsm,
-    "Bash": QsciLexerBash,
-    "Batch": QsciLexerBatch,
+BUILTIN_LANGUAGES = {
+    "Assembly (x86)": "PyQt6.Qsci.QsciLexerAsm",
+    "Bash": "PyQt6.Qsci.QsciLexerBash",
+    "Batch": "PyQt6.Qsci.QsciLexerBatch",
     #"Brainfuck": BrainfuckLexer,
-    "CMake": QsciLexerCMake,
-    "C#": QsciLexerCSharp,
-    "C++": QsciLexerCPP,
-    "CoffeeScript": QsciLexerCoffeeScript,
-    "CSS": QsciLexerCSS,
-    "D": QsciLexerD,
-    "Diff": QsciLexerDiff,
-    "Fortran": QsciLexerFortran,
-    "Fortran '77": QsciLexerFortran77,
-    "HTML": QsciLexerHTML,
-    "Java": QsciLexerJava,
-    "JavaScript": QsciLexerJavaScript,
-    "JSON": QsciLexerJSON,
-    "Lua": QsciLexerLua,
-    "Makefile": QsciLexerMakefile,
-    "Markdown": QsciLexerMarkdown,
-    "MASM": QsciLexerMASM,
-    "Matlab": QsciLexerMatlab,
-    "Pascal": QsciLexerPascal,
-    "Perl": QsciLexerPerl,
-    "PostScript": QsciLexerPostScript,
-    "Python": QsciLexerPython,
-    "Ruby": QsciLexerRuby,
-    "XML": QsciLexerXML,
-    "YAML": QsciLexerYAML
+    "CMake": "PyQt6.Qsci.QsciLexerCMake",
+    "C#": "PyQt6.Qsci.QsciLexerCSharp",
+    "C++": "PyQt6.Qsci.QsciLexerCPP",
+    "CoffeeScript": "PyQt6.Qsci.QsciLexerCoffeeScript",
+    "CSS": "PyQt6.Qsci.QsciLexerCSS",
+    "D": "PyQt6.Qsci.QsciLexerD",
+    "Diff": "PyQt6.Qsci.QsciLexerDiff",
+    "Fortran": "PyQt6.Qsci.QsciLexerFortran",
+    "Fortran '77": "PyQt6.Qsci.QsciLexerFortran77",
+    "HTML": "PyQt6.Qsci.QsciLexerHTML",
+    "Java": "PyQt6.Qsci.QsciLexerJava",
+    "JavaScript": "PyQt6.Qsci.QsciLexerJavaScript",
+    "JSON": "PyQt6.Qsci.QsciLexerJSON",
+    "Lua": "PyQt6.Qsci.QsciLexerLua",
+    "Makefile": "PyQt6.Qsci.QsciLexerMakefile",
+    "Markdown": "PyQt6.Qsci.QsciLexerMarkdown",
+    "MASM": "PyQt6.Qsci.QsciLexerMASM",
+    "Matlab": "PyQt6.Qsci.QsciLexerMatlab",
+    "Pascal": "PyQt6.Qsci.QsciLexerPascal",
+    "Perl": "PyQt6.Qsci.QsciLexerPerl",
+    "PostScript": "PyQt6.Qsci.QsciLexerPostScript",
+    "Python": "PyQt6.Qsci.QsciLexerPython",
+    "Ruby": "PyQt6.Qsci.QsciLexerRuby",
+    "XML": "PyQt6.Qsci.QsciLexerXML",
+    "YAML": "PyQt6.Qsci.QsciLexerYAML"
 }
 
-for lang_name, lexer_info in GENERIC_LEXERS.items():
-    DEFAULT_LANGUAGES[lang_name] = lexer_info["class"]
+LEXER_REGISTRY = LexerRegistry()
+LANGUAGE_REGISTRY = LanguageRegistry()
+
+for lang_name, path in BUILTIN_LANGUAGES.items():
+    LANGUAGE_REGISTRY.register(lang_name, path)
+LANGUAGE_REGISTRY.extensions.update(BUILTIN_EXTENSIONS)
+
+# JSON-defined languages replace built-in ones of the same name
+load_generic_lexers()
+
+# language name -> lexer class and extension -> lexer class, both importing classes on lookup
+DEFAULT_LANGUAGES = LazyLexerMap(LANGUAGE_REGISTRY.languages)
+DEFAULT_LEXER_TYPES = LazyLexerMap(LANGUAGE_REGISTRY.extensions, by_extension=True)
+
+def get_language_for_file(file_name):
+    return LANGUAGE_REGISTRY.language_for_file(file_name)
 
 def get_lexer_for_file(file_name):
-    for ext, lexer_class in DEFAULT_LEXER_TYPES.items():
-        if file_name.endswith(ext):
-            return lexer_class
-    return None
\ No newline at end of file
+    language = LANGUAGE_REGISTRY.language_for_file(file_name)
+    return LANGUAGE_REGISTRY.lexer_class(language) if language else None
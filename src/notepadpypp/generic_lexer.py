@@ -1,12 +1,47 @@
-from PyQt6.Qsci import QsciLexerCustom
+from PyQt6.Qsci import QsciLexerCustom, QsciScintilla
 from PyQt6.QtGui import QColor, QFont
+from types import MappingProxyType
+from document_buffer import line_text
+import contextlib
+import itertools
 import re
 import json
 import os
 
 class GenericLexer(QsciLexerCustom):
     """A generic lexer that can be configured via JSON files."""
-    
+
+    # lexer state a line ends in, kept in the Scintilla line state (low 20 bits). Strings also
+    # record which delimiter opened them in the bits above the kind, and the fold depth at the
+    # end of the line sits above that.
+    STATE_DEFAULT = 0
+    STATE_BLOCK_COMMENT = 1
+    STATE_STRING = 2
+    STATE_STRING2 = 3
+    STATE_KIND_MASK = 0x3
+    STATE_DELIMITER_SHIFT = 2
+    STATE_DELIMITER_MASK = 0x3F
+    STATE_FOLD_SHIFT = 8
+    STATE_FOLD_MASK = 0xFFF # the 12 bits above STATE_FOLD_SHIFT, up to STATE_MASK
+    STATE_MASK = 0xFFFFF
+    MAX_FOLD_DEPTH = QsciScintilla.SC_FOLDLEVELNUMBERMASK - QsciScintilla.SC_FOLDLEVELBASE
+
+    # every lexer instance tags the line states it writes, so states left behind by another
+    # lexer (or another language) are never mistaken for valid ones
+    _state_tags = itertools.count()
+
+    # styles are collected into a byte buffer and handed to Scintilla in one call per run of
+    # consecutive lines, flushing early once the buffer grows past this many bytes
+    STYLE_BUFFER_SIZE = 0x10000
+    _style_bytes = [bytes((style,)) for style in range(256)]
+    _non_ascii_re = re.compile(r"[^\x00-\x7f]")
+    _property_re = re.compile(r"[ \t]*:")
+    _line_re = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)?")
+
+    # compiled rules are shared by every lexer built from the same settings, so a language
+    # is only compiled again when its config changes, not on every tab or language switch
+    _rules_cache = {}
+
     def __init__(self, parent=None, lang_name="Generic", config=None):
         super().__init__(parent)
         
@@ -56,7 +91,19 @@ class GenericLexer(QsciLexerCustom):
         self.case_sensitive = self.config.get("case_sensitive", True)
         self.detect_numbers = self.config.get("detect_numbers", True)
         self.property_pattern = self.config.get("property_pattern", None)
+        self.fold_open = self.config.get("fold_open", [])
+        self.fold_close = self.config.get("fold_close", [])
         
+        # while a document is styled in the background, requests past this position are left
+        # for the background pass instead of being styled right away
+        self.styling_horizon = None
+        # bumped on every insert and delete, so work done on a snapshot of the text can tell
+        # whether the document moved on in the meantime
+        self.modification_count = 0
+
+        self._state_tag = (next(self._state_tags) % 0x7FF + 1) << 20
+        self._compile_rules()
+
         self.setDefaultFont(QFont("Courier New", 12))
 
     def language(self):
@@ -65,159 +112,471 @@ class GenericLexer(QsciLexerCustom):
     def description(self, style):
         return self.style_names.get(style, "")
 
+    def setEditor(self, editor):
+        """Attaches the lexer to an editor, watching its edits to invalidate cached line states."""
+        old_editor = self.editor()
+        if old_editor is not None:
+            try:
+                old_editor.SCN_MODIFIED.disconnect(self._on_modified)
+            except TypeError:
+                pass
+
+        super().setEditor(editor)
+
+        if editor is not None:
+            editor.SCN_MODIFIED.connect(self._on_modified)
+
+    @contextlib.contextmanager
+    def _unwatched(self, editor):
+        """Stops listening to the editor while line states and fold levels are set. Styling
+        never changes the text, and every one of those changes would call _on_modified."""
+        editor.SCN_MODIFIED.disconnect(self._on_modified)
+        try:
+            yield
+        finally:
+            editor.SCN_MODIFIED.connect(self._on_modified)
+
+    def _on_modified(self, position, modification_type, *args):
+        """Forgets the cached state of the line an insert or delete touches and counts the edit."""
+        if not modification_type & (QsciScintilla.SC_MOD_BEFOREINSERT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+
+        editor = self.editor()
+        if editor is None:
+            return
+
+        self.modification_count += 1
+
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, 0)
+
+        # Scintilla gives every inserted line a copy of the following line's state,
+        # so clearing that one before the insert clears all the new lines as well
+        if modification_type & QsciScintilla.SC_MOD_BEFOREINSERT:
+            editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line + 1, 0)
+
+    def cached_state(self, editor, line):
+        """Returns the state a line ended in last time it was styled, or None if unknown."""
+        if line < 0:
+            return self.STATE_DEFAULT
+
+        line_state = editor.SendScintilla(QsciScintilla.SCI_GETLINESTATE, line)
+        if line_state & ~self.STATE_MASK != self._state_tag:
+            return None
+        return line_state & self.STATE_MASK
+
+    def first_stale_line(self, editor, line, last_line):
+        """Returns the first line from the given one (stopping at last_line) that has to be
+        styled again. Lines that still have a cached state were styled from the current state
+        of the line before them, so they are up to date as long as that one is."""
+        if self.cached_state(editor, line - 1) is None:
+            return line
+
+        last_line = min(last_line, editor.lines())
+        while line < last_line and self.cached_state(editor, line) is not None:
+            line += 1
+        return line
+
     def styleText(self, start, end):
         editor = self.editor()
         if not editor:
             return
 
-        full_text = editor.text()
-        
-        line_start = 0
-        if start > 0:
-            line_start = full_text.rfind('\n', 0, start)
-            if line_start == -1:
-                line_start = 0
-            else:
-                line_start += 1
-        
-        self.startStyling(line_start, 0xFF)
-        
-        i = line_start
-        in_string = False
-        in_string2 = False
-        string_delimiter = None
-        in_block_comment = False
-        
-        while i < len(full_text) and i < end:
-            if not in_string and not in_string2 and self.block_comment_start:
-                if full_text[i:i+len(self.block_comment_start)] == self.block_comment_start:
-                    in_block_comment = True
-                    comment_end = full_text.find(self.block_comment_end, i + len(self.block_comment_start))
-                    if comment_end == -1:
-                        comment_len = len(full_text) - i
-                    else:
-                        comment_len = comment_end - i + len(self.block_comment_end)
-                    self.setStyling(comment_len, self.COMMENT)
-                    i += comment_len
-                    continue
-            
-            if not in_string and not in_string2 and self.line_comment:
-                if full_text[i:i+len(self.line_comment)] == self.line_comment:
-                    line_end = full_text.find('\n', i)
-                    if line_end == -1:
-                        line_end = len(full_text)
-                    self.setStyling(line_end - i, self.LINE_COMMENT)
-                    i = line_end
-                    continue
-            
-            if full_text[i] in self.string_delimiters:
-                if not in_string2:
-                    if in_string and full_text[i] == string_delimiter:
-                        if i > 0 and full_text[i-1] == '\\':
-                            self.setStyling(1, self.STRING)
-                            i += 1
-                            continue
-                        in_string = False
-                        string_delimiter = None
-                        
-                        is_property = False
-                        if self.property_pattern:
-                            j = i + 1
-                            while j < len(full_text) and full_text[j] in ' \t':
-                                j += 1
-                            if j < len(full_text) and full_text[j] == ':':
-                                is_property = True
-                        
-                        self.setStyling(1, self.PROPERTY if is_property else self.STRING)
-                    else:
-                        in_string = True
-                        string_delimiter = full_text[i]
-                        
-                        is_property = False
-                        if self.property_pattern:
-                            quote_end = full_text.find(string_delimiter, i + 1)
-                            if quote_end != -1:
-                                j = quote_end + 1
-                                while j < len(full_text) and full_text[j] in ' \t':
-                                    j += 1
-                                if j < len(full_text) and full_text[j] == ':':
-                                    is_property = True
-                        
-                        self.setStyling(1, self.PROPERTY if is_property else self.STRING)
-                    i += 1
-                    continue
-            
-            elif full_text[i] in self.string2_delimiters:
-                if not in_string:
-                    if in_string2 and full_text[i] == string_delimiter:
-                        if i > 0 and full_text[i-1] == '\\':
-                            self.setStyling(1, self.STRING2)
-                            i += 1
-                            continue
-                        in_string2 = False
-                        string_delimiter = None
-                        self.setStyling(1, self.STRING2)
-                    else:
-                        in_string2 = True
-                        string_delimiter = full_text[i]
-                        self.setStyling(1, self.STRING2)
-                    i += 1
-                    continue
-            
-            if in_string:
-                self.setStyling(1, self.STRING)
-                i += 1
+        if self.styling_horizon is not None:
+            end = min(end, self.styling_horizon)
+            if end <= start:
+                return
+
+        with self._unwatched(editor):
+            self._style_lines(editor, start, end)
+
+    def _style_lines(self, editor, start, end):
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        last_line = min(editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, end), editor.lines() - 1)
+
+        state = self.cached_state(editor, line - 1)
+        if state is None:
+            state = self.STATE_DEFAULT
+
+        # once a line ends in the same state as last time, the lines after it that still
+        # have a valid cached state are styled correctly already and can be skipped
+        converged = False
+        styles = bytearray()
+        styles_start = None
+
+        while line <= last_line:
+            cached = self.cached_state(editor, line)
+
+            if converged and cached is not None:
+                self.apply_styles(styles_start, styles)
+                styles_start = None
+                state = cached
+                line += 1
                 continue
-            elif in_string2:
-                self.setStyling(1, self.STRING2)
-                i += 1
+
+            if styles_start is None:
+                styles_start = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+            elif len(styles) >= self.STYLE_BUFFER_SIZE:
+                styles_start += self.apply_styles(styles_start, styles)
+
+            text = editor.text(line)
+            if "\ufffd" in text:
+                # invalid UTF-8 comes back as U+FFFD; the raw line keeps one character per byte
+                text = line_text(editor, line)
+            previous, state = state, self.style_line(text, state, styles)
+            editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, self._state_tag | state)
+            editor.SendScintilla(QsciScintilla.SCI_SETFOLDLEVEL, line, self.fold_level(previous, state))
+            converged = cached == state
+            line += 1
+
+        if styles_start is not None:
+            self.apply_styles(styles_start, styles)
+        else:
+            self.startStyling(editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line))
+
+        if not converged and line < editor.lines():
+            # the next line was styled from a state that no longer holds
+            editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, 0)
+
+    def tokenize(self, text, state=STATE_DEFAULT):
+        """Styles a snapshot of whole lines without touching the editor, so it can run on a
+        worker thread. Returns the style bytes, the line state and fold level of every line and
+        the state the last line ends in, ready for apply_tokenized."""
+        styles = bytearray()
+        line_states = []
+        fold_levels = []
+
+        for match in self._line_re.finditer(text):
+            line = match.group()
+            if not line:
+                break
+            previous, state = state, self.style_line(line, state, styles)
+            line_states.append(self._state_tag | state)
+            fold_levels.append(self.fold_level(previous, state))
+
+        return styles, line_states, fold_levels, state
+
+    def apply_tokenized(self, line, styles, line_states, fold_levels, state):
+        """Applies the result of tokenize for a snapshot starting at the given line."""
+        editor = self.editor()
+        if not editor:
+            return
+
+        next_line = line + len(line_states)
+        cached = self.cached_state(editor, next_line - 1)
+
+        self.apply_styles(editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line), styles)
+        with self._unwatched(editor):
+            for offset, (line_state, fold_level) in enumerate(zip(line_states, fold_levels)):
+                editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line + offset, line_state)
+                editor.SendScintilla(QsciScintilla.SCI_SETFOLDLEVEL, line + offset, fold_level)
+
+            if cached != state and next_line < editor.lines():
+                # the next line was styled from a state that no longer holds
+                editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, next_line, 0)
+
+    def _compile_rules(self):
+        """Looks up (or builds) the compiled rules for this lexer's language config."""
+        key = (
+            self.case_sensitive, self.detect_numbers, self.line_comment,
+            self.block_comment_start, self.block_comment_end,
+            tuple(self.string_delimiters), tuple(self.string2_delimiters), tuple(self.operators),
+            frozenset(self.keywords1), frozenset(self.keywords2),
+            frozenset(self.keywords3), frozenset(self.keywords4),
+            tuple(self.fold_open), tuple(self.fold_close)
+        )
+        rules = self._rules_cache.get(key)
+        if rules is None:
+            rules = self._rules_cache[key] = self._build_rules()
+
+        (
+            self._token_re, self._keyword_styles, self._fold_markers, self._fold_tokens,
+            self._block_comment_tail_re, self._string_rules
+        ) = rules
+        self._token_styles = {
+            "line_comment": self.LINE_COMMENT,
+            "number": self.NUMBER,
+            "operator": self.OPERATOR,
+            "fold": self.DEFAULT,
+            "fold_open": self.OPERATOR,
+            "fold_close": self.OPERATOR,
+        }
+
+    def _build_rules(self):
+        """Compiles the language config into one master regex, tried in the same order the
+        rules have always been checked in, a keyword to style table, and the patterns that
+        carry a string or block comment over from the previous line."""
+        # only single characters can ever open a string
+        delimiters = [d for d in self.string_delimiters if len(d) == 1]
+        delimiters2 = [d for d in self.string2_delimiters if len(d) == 1 and d not in delimiters]
+
+        def char_class(chars, negate=False):
+            return "[" + ("^" if negate else "") + "".join(re.escape(c) for c in chars) + "]"
+
+        def string_chain(chars, name):
+            # a run of string segments: an unescaped copy of the open delimiter closes the
+            # string, any other delimiter reopens it with that delimiter instead
+            def segment(group):
+                return f"(?P<{group}>{char_class(chars)})(?:{char_class(chars, negate=True)}|(?<=\\\\)(?P={group}))*"
+
+            reopened, last = f"{name}_reopened", f"{name}_delimiter"
+            return (
+                f"(?:{segment(reopened)}(?!(?P={reopened})){char_class(chars).join(('(?=', ')'))})*"
+                f"{segment(last)}(?P={last})?"
+            )
+
+        def trie(words):
+            # an alternation shaped like a prefix tree, which the regex engine walks a
+            # character at a time; greedy optional branches keep longest-match semantics
+            root = {}
+            for word in words:
+                node = root
+                for char in word:
+                    node = node.setdefault(char, {})
+                node[""] = {}
+
+            def branch(node):
+                alternatives = [re.escape(char) + branch(child) for char, child in sorted(node.items()) if char]
+                if not alternatives:
+                    return ""
+                pattern = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+                return f"(?:{pattern})?" if "" in node else pattern
+
+            return branch(root)
+
+        rules = []
+        if self.block_comment_start:
+            rules.append((
+                "block_comment",
+                f"{re.escape(self.block_comment_start)}"
+                f"(?:.*?(?P<block_comment_end>{re.escape(self.block_comment_end)})|.*)"
+            ))
+        if self.line_comment:
+            rules.append(("line_comment", f"{re.escape(self.line_comment)}[^\\n]*"))
+        if delimiters:
+            rules.append(("string", string_chain(delimiters, "string")))
+        if delimiters2:
+            rules.append(("string2", string_chain(delimiters2, "string2")))
+        if self.detect_numbers:
+            rules.append(("number", r"-?\d+\.?\d*(?:[eE][+-]?\d+)?"))
+        # keywords are whole words, looked up once the word is matched
+        rules.append(("word", r"[^\W\d]\w*"))
+        operators = [op for op in self.operators if op]
+
+        # fold markers are words or symbols. Words are looked up like keywords; symbols that are
+        # operators get rules of their own ahead of the other operators (unless a longer operator
+        # starts with them) so matching them says which way they fold, and other symbols are
+        # matched after the operators.
+        fold_markers = {}
+        for markers, delta in ((self.fold_open, 1), (self.fold_close, -1)):
+            for marker in markers:
+                if marker:
+                    fold_markers.setdefault(marker if self.case_sensitive else marker.casefold(), delta)
+        fold_tokens = {}
+        fold_operators = {1: [], -1: []}
+        fold_symbols = []
+        for marker, delta in fold_markers.items():
+            if re.fullmatch(r"[^\W\d]\w*", marker):
                 continue
-            
-            if self.detect_numbers and (full_text[i].isdigit() or 
-                (full_text[i] == '-' and i < len(full_text) - 1 and full_text[i+1].isdigit())):
-                num_match = re.match(r'-?\d+\.?\d*([eE][+-]?\d+)?', full_text[i:])
-                if num_match:
-                    num_len = len(num_match.group())
-                    self.setStyling(num_len, self.NUMBER)
-                    i += num_len
+            if marker not in operators:
+                fold_symbols.append(marker)
+            elif any(op != marker and op.startswith(marker) for op in operators):
+                fold_tokens["operator"] = 0
+            else:
+                fold_operators[delta].append(marker)
+        for name, delta in (("fold_open", 1), ("fold_close", -1)):
+            if fold_operators[delta]:
+                rules.append((name, trie(fold_operators[delta])))
+                fold_tokens[name] = delta
+                operators = [op for op in operators if op not in fold_operators[delta]]
+        if operators:
+            rules.append(("operator", trie(operators)))
+        if fold_symbols:
+            rules.append(("fold", trie(fold_symbols)))
+            fold_tokens["fold"] = 0
+
+        token_re = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in rules), re.DOTALL)
+
+        # the first list a word appears in wins
+        keyword_styles = {}
+        for style, keywords in (
+            (self.KEYWORD1, self.keywords1),
+            (self.KEYWORD2, self.keywords2),
+            (self.KEYWORD3, self.keywords3),
+            (self.KEYWORD4, self.keywords4),
+        ):
+            for keyword in keywords:
+                keyword_styles.setdefault(keyword if self.case_sensitive else keyword.casefold(), style)
+
+        block_comment_tail_re = re.compile(f".*?{re.escape(self.block_comment_end)}", re.DOTALL)
+
+        # per string kind: a segment opener, the delimiters it reacts to, and the body of a
+        # string continued from the previous line for each delimiter
+        string_rules = {}
+        for style, chars, name in ((self.STRING, delimiters, "string"), (self.STRING2, delimiters2, "string2")):
+            if chars:
+                string_rules[style] = (
+                    re.compile(string_chain(chars, name)),
+                    re.compile(char_class(chars)),
+                    {d: re.compile(f"(?:{char_class(chars, negate=True)}|(?<=\\\\){re.escape(d)})*") for d in chars}
+                )
+
+        return (
+            token_re, MappingProxyType(keyword_styles), MappingProxyType(fold_markers), MappingProxyType(fold_tokens),
+            block_comment_tail_re, MappingProxyType(string_rules)
+        )
+
+    def apply_styles(self, start, styles):
+        """Hands a buffer of style bytes to Scintilla in one go, starting at the given
+        position, and empties it. Returns how many bytes were styled."""
+        length = len(styles)
+        if length:
+            self.startStyling(start)
+            self.editor().SendScintilla(QsciScintilla.SCI_SETSTYLINGEX, length, bytes(styles))
+            styles.clear()
+        return length
+
+    def _style_string(self, styles, text, start, end, delimiter, style):
+        """Styles a string token, picking out property names, and returns the delimiter still
+        open at its end (None if the string was closed)."""
+        _, delimiter_re, _ = self._string_rules[style]
+        find_properties = style == self.STRING and self.property_pattern
+        styled = start
+
+        for match in delimiter_re.finditer(text, start, end):
+            i = match.start()
+            char = text[i]
+
+            if char == delimiter:
+                if i > 0 and text[i-1] == '\\':
                     continue
-            
-            if full_text[i].isalpha() or full_text[i] == '_':
-                word_match = re.match(r'[\w]+', full_text[i:])
-                if word_match:
-                    word = word_match.group()
-                    word_len = len(word)
-                    
-                    word_check = word if self.case_sensitive else word.lower()
-                    keywords_check1 = self.keywords1 if self.case_sensitive else {k.lower() for k in self.keywords1}
-                    keywords_check2 = self.keywords2 if self.case_sensitive else {k.lower() for k in self.keywords2}
-                    keywords_check3 = self.keywords3 if self.case_sensitive else {k.lower() for k in self.keywords3}
-                    keywords_check4 = self.keywords4 if self.case_sensitive else {k.lower() for k in self.keywords4}
-                    
-                    if word_check in keywords_check1:
-                        self.setStyling(word_len, self.KEYWORD1)
-                    elif word_check in keywords_check2:
-                        self.setStyling(word_len, self.KEYWORD2)
-                    elif word_check in keywords_check3:
-                        self.setStyling(word_len, self.KEYWORD3)
-                    elif word_check in keywords_check4:
-                        self.setStyling(word_len, self.KEYWORD4)
-                    else:
-                        self.setStyling(word_len, self.DEFAULT)
-                    
-                    i += word_len
+                delimiter = None
+                is_property = find_properties and self._property_re.match(text, i + 1)
+            else:
+                delimiter = char
+                quote_end = text.find(char, i + 1) if find_properties else -1
+                is_property = quote_end != -1 and self._property_re.match(text, quote_end + 1)
+
+            if is_property:
+                styles += self._style_bytes[style] * (i - styled) + self._style_bytes[self.PROPERTY]
+                styled = i + 1
+
+        styles += self._style_bytes[style] * (end - styled)
+        return delimiter
+
+    def _string_state(self, style, delimiter, level):
+        """Line state for a line ending inside a string opened by the given delimiter."""
+        if style == self.STRING:
+            kind, index = self.STATE_STRING, self.string_delimiters.index(delimiter)
+        else:
+            kind, index = self.STATE_STRING2, self.string2_delimiters.index(delimiter)
+        return kind | index << self.STATE_DELIMITER_SHIFT | level << self.STATE_FOLD_SHIFT
+
+    def _fold_depth(self, level):
+        return min(max(level, 0), self.MAX_FOLD_DEPTH)
+
+    def _state_fold_depth(self, state):
+        # MAX_FOLD_DEPTH isn't all ones, so it can only clamp what the mask extracts
+        return min(state >> self.STATE_FOLD_SHIFT & self.STATE_FOLD_MASK, self.MAX_FOLD_DEPTH)
+
+    def fold_level(self, start_state, end_state):
+        """Scintilla fold level of a line that starts in start_state and ends in end_state. Lines
+        that open more blocks than they close are fold headers."""
+        start = self._state_fold_depth(start_state)
+        end = self._state_fold_depth(end_state)
+        level = QsciScintilla.SC_FOLDLEVELBASE + start
+        if end > start:
+            level |= QsciScintilla.SC_FOLDLEVELHEADERFLAG
+        return level
+
+    def style_line(self, text, state, styles):
+        """Styles one line of text starting in the given state, appending a style byte per
+        UTF-8 byte of the line to styles. Returns the state the line ends in."""
+        mark = len(styles)
+        state = self._tokenize_line(text, state, styles)
+
+        if not text.isascii():
+            # tokens are measured in characters, Scintilla wants a style for every byte
+            line_styles = styles[mark:]
+            del styles[mark:]
+            styled = 0
+            for match in self._non_ascii_re.finditer(text):
+                i = match.start()
+                styles += line_styles[styled:i] + line_styles[i:i + 1] * len(match.group().encode("utf-8", "surrogateescape"))
+                styled = i + 1
+            styles += line_styles[styled:]
+
+        return state
+
+    def _tokenize_line(self, text, state, styles):
+        kind = state & self.STATE_KIND_MASK
+        level = self._state_fold_depth(state)
+        pos = 0
+
+        if kind == self.STATE_BLOCK_COMMENT:
+            match = self._block_comment_tail_re.match(text)
+            if not match:
+                styles += self._style_bytes[self.COMMENT] * len(text)
+                return state
+            pos = match.end()
+            styles += self._style_bytes[self.COMMENT] * pos
+            level -= 1
+
+        elif kind != self.STATE_DEFAULT:
+            index = state >> self.STATE_DELIMITER_SHIFT & self.STATE_DELIMITER_MASK
+            if kind == self.STATE_STRING:
+                style, delimiter = self.STRING, self.string_delimiters[index]
+            else:
+                style, delimiter = self.STRING2, self.string2_delimiters[index]
+
+            chain_re, _, body_res = self._string_rules[style]
+            pos = body_res[delimiter].match(text).end()
+            if pos < len(text):
+                pos = pos + 1 if text[pos] == delimiter else chain_re.match(text, pos).end()
+
+            delimiter = self._style_string(styles, text, 0, pos, delimiter, style)
+            if delimiter is not None:
+                return self._string_state(style, delimiter, self._fold_depth(level))
+
+        keyword_styles = self._keyword_styles
+        fold_markers = self._fold_markers
+        fold_tokens = self._fold_tokens
+        case_sensitive = self.case_sensitive
+
+        for match in self._token_re.finditer(text, pos):
+            token = match.lastgroup
+            if token == "word":
+                word = match.group()
+                if not case_sensitive:
+                    word = word.casefold()
+                if word in fold_markers:
+                    level += fold_markers[word]
+                style = keyword_styles.get(word)
+                if style is None:
                     continue
-            
-            matched_op = False
-            for op in sorted(self.operators, key=len, reverse=True):
-                if full_text[i:i+len(op)] == op:
-                    self.setStyling(len(op), self.OPERATOR)
-                    i += len(op)
-                    matched_op = True
-                    break
-            
-            if matched_op:
-                continue
-            
-            self.setStyling(1, self.DEFAULT)
-            i += 1
\ No newline at end of file
+            else:
+                style = self._token_styles.get(token)
+
+            start, end = match.span()
+            styles += self._style_bytes[self.DEFAULT] * (start - pos)
+            pos = end
+
+            if token == "block_comment":
+                styles += self._style_bytes[self.COMMENT] * (end - start)
+                if match.group("block_comment_end") is None:
+                    return self.STATE_BLOCK_COMMENT | self._fold_depth(level + 1) << self.STATE_FOLD_SHIFT
+            elif token in ("string", "string2"):
+                style = self.STRING if token == "string" else self.STRING2
+                delimiter = self._style_string(styles, text, start, end, None, style)
+                if delimiter is not None:
+                    return self._string_state(style, delimiter, self._fold_depth(level))
+            else:
+                styles += self._style_bytes[style] * (end - start)
+                if token in fold_tokens:
+                    # rules of their own say which way they fold, anything else is looked up
+                    level += fold_tokens[token] or fold_markers.get(match.group(), 0)
+
+        styles += self._style_bytes[self.DEFAULT] * (len(text) - pos)
+        if not 0 <= level <= self.MAX_FOLD_DEPTH:
+            level = self._fold_depth(level)
+        return self.STATE_DEFAULT | level << self.STATE_FOLD_SHIFT
@@ -0,0 +1,254 @@
+import mmap
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFontMetricsF, QPainter
+from PyQt6.QtWidgets import QAbstractScrollArea
+
+# bytes shown as themselves in the ASCII column, everything else is a dot
+PRINTABLE = bytes(b if 0x20 <= b < 0x7F else 0x2E for b in range(256))
+
+
+def parse_byte_pattern(text):
+    """Turns what was typed into a byte search into bytes: quoted text is searched for as
+    UTF-8, anything else is read as hex digits ("4D 5A 90"). Raises ValueError if it's neither."""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1].encode("utf-8")
+    return bytes.fromhex(text)
+
+
+class HexView(QAbstractScrollArea):
+    """Shows a file as rows of offset, hex bytes and ASCII.
+
+    The file is memory-mapped and only the rows on screen are read and painted, so opening
+    and scrolling cost the same whatever the size of the file."""
+
+    cursor_moved = pyqtSignal(int)
+
+    BYTES_PER_ROW = 16
+    MAX_SCROLL = 0x7FFFFFFF # scroll bar values are C ints; bigger files scroll several rows per step
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.file = open(file_path, "rb")
+        size = self.file.seek(0, 2)
+        # empty files can't be mapped
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size
+
+        self.cursor = 0
+        self.anchor = None # other end of the selection, if there is one
+        rows = max(1, -(-size // self.BYTES_PER_ROW))
+        self.rows = rows
+        self.row_step = max(1, -(-rows // self.MAX_SCROLL))
+        self.offset_digits = max(8, len(f"{max(size - 1, 0):X}"))
+
+        self.background = QColor("#ffffff")
+        self.foreground = QColor("#000000")
+        self.margins = QColor("#e0e0e0")
+
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.update_scroll_range()
+
+    def set_colors(self, background, foreground, margins):
+        self.background, self.foreground, self.margins = background, foreground, margins
+        self.viewport().update()
+
+    def close_file(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    # layout
+
+    def char_width(self):
+        # fractional, or columns drift apart from the text over a row
+        return QFontMetricsF(self.font()).horizontalAdvance("0")
+
+    def row_height(self):
+        return self.fontMetrics().height()
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.row_height())
+
+    def top_row(self):
+        return min(self.verticalScrollBar().value() * self.row_step, self.rows - 1)
+
+    def columns(self):
+        """Returns the x of the hex column and of the ASCII column."""
+        width = self.char_width()
+        hex_x = (self.offset_digits + 2) * width
+        return hex_x, hex_x + (self.BYTES_PER_ROW * 3 + 2) * width
+
+    def hex_x(self, column):
+        # an extra space splits the row in halves
+        return self.columns()[0] + (column * 3 + (column >= self.BYTES_PER_ROW // 2)) * self.char_width()
+
+    def update_scroll_range(self):
+        visible = self.visible_rows()
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setRange(0, max(0, self.rows - visible) // self.row_step + (self.row_step > 1))
+        scroll_bar.setPageStep(max(1, visible // self.row_step))
+        scroll_bar.setSingleStep(1)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        self.update_scroll_range()
+        self.viewport().update()
+
+    # painting
+
+    def selection(self):
+        """Returns the selected range as (start, end), end exclusive, or None."""
+        if self.anchor is None:
+            return None
+        return min(self.anchor, self.cursor), max(self.anchor, self.cursor) + 1
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        rect = self.viewport().rect()
+        width, height = self.char_width(), self.row_height()
+        ascent = self.fontMetrics().ascent()
+        hex_x, ascii_x = self.columns()
+
+        painter.fillRect(rect, self.background)
+        painter.fillRect(QRectF(0, 0, hex_x - width, rect.height()), self.margins)
+
+        per_row = self.BYTES_PER_ROW
+        half = per_row // 2
+        first = self.top_row()
+        start = first * per_row
+        chunk = self.data[start:min(self.size, start + (self.visible_rows() + 1) * per_row)]
+        selection = self.selection()
+        highlight = self.palette().highlight()
+
+        for index in range(0, max(len(chunk), 1), per_row):
+            row = chunk[index:index + per_row]
+            offset = start + index
+            y = (index // per_row) * height
+
+            if selection and selection[0] < offset + len(row) and selection[1] > offset:
+                low = max(selection[0], offset) - offset
+                high = min(selection[1], offset + len(row)) - offset
+                painter.fillRect(QRectF(self.hex_x(low), y, self.hex_x(high - 1) - self.hex_x(low) + 2 * width, height), highlight)
+                painter.fillRect(QRectF(ascii_x + low * width, y, (high - low) * width, height), highlight)
+            if offset <= self.cursor < offset + per_row:
+                column = self.cursor - offset
+                painter.setPen(self.foreground)
+                painter.drawRect(QRectF(self.hex_x(column), y, 2 * width - 1, height - 1))
+                painter.drawRect(QRectF(ascii_x + column * width, y, width - 1, height - 1))
+
+            painter.setPen(self.foreground)
+            painter.drawText(QPointF(width, y + ascent), f"{offset:0{self.offset_digits}X}")
+            painter.drawText(QPointF(hex_x, y + ascent), f"{row[:half].hex(' ')}  {row[half:].hex(' ')}".upper())
+            painter.drawText(QPointF(ascii_x, y + ascent), row.translate(PRINTABLE).decode("ascii"))
+
+    # moving around
+
+    def set_cursor(self, offset, extend=False):
+        offset = max(0, min(offset, self.size - 1)) if self.size else 0
+        if extend:
+            if self.anchor is None:
+                self.anchor = self.cursor
+        else:
+            self.anchor = None
+        self.cursor = offset
+        self.ensure_visible(offset)
+        self.viewport().update()
+        self.cursor_moved.emit(offset)
+
+    def goto_offset(self, offset):
+        self.set_cursor(offset)
+
+    def select(self, start, end):
+        """Selects the bytes from start to end (exclusive)."""
+        self.set_cursor(start)
+        self.anchor = start
+        self.cursor = max(start, end - 1)
+        self.viewport().update()
+
+    def ensure_visible(self, offset):
+        row = offset // self.BYTES_PER_ROW
+        top, visible = self.top_row(), self.visible_rows()
+        if row < top:
+            self.verticalScrollBar().setValue(row // self.row_step)
+        elif row >= top + visible:
+            self.verticalScrollBar().setValue((row - visible + 1 + self.row_step - 1) // self.row_step)
+
+    def offset_at(self, position):
+        """Returns the offset of the byte under a point of the viewport."""
+        width = self.char_width()
+        hex_x, ascii_x = self.columns()
+        x = position.x()
+        if x >= ascii_x - width:
+            column = (x - ascii_x) // width
+        else:
+            column = (x - hex_x) // (3 * width)
+            if column >= self.BYTES_PER_ROW // 2:
+                column = (x - hex_x - width) // (3 * width)
+        column = max(0, min(int(column), self.BYTES_PER_ROW - 1))
+        row = self.top_row() + int(position.y()) // self.row_height()
+        return row * self.BYTES_PER_ROW + column
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            extend = bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+            self.set_cursor(self.offset_at(event.position()), extend)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.set_cursor(self.offset_at(event.position()), True)
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        per_row = self.BYTES_PER_ROW
+        page = self.visible_rows() * per_row
+        control = bool(event.modifiers() & Qt.KeyboardModifier.ControlModifier)
+        moves = {
+            Qt.Key.Key_Left: self.cursor - 1,
+            Qt.Key.Key_Right: self.cursor + 1,
+            Qt.Key.Key_Up: self.cursor - per_row,
+            Qt.Key.Key_Down: self.cursor + per_row,
+            Qt.Key.Key_PageUp: self.cursor - page,
+            Qt.Key.Key_PageDown: self.cursor + page,
+            Qt.Key.Key_Home: 0 if control else self.cursor - self.cursor % per_row,
+            Qt.Key.Key_End: self.size - 1 if control else self.cursor - self.cursor % per_row + per_row - 1,
+        }
+        if key not in moves:
+            super().keyPressEvent(event)
+            return
+        target = moves[key]
+        if key in (Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp, Qt.Key.Key_PageDown) and not 0 <= target < self.size:
+            # stay in the same column instead of jumping to the first or last byte
+            target = self.cursor
+        self.set_cursor(target, bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier))
+
+    # searching
+
+    def find(self, pattern, forward=True, wrap_around=False):
+        """Finds a byte pattern after (or before) the cursor and selects it. Returns whether it was found."""
+        if not pattern:
+            return False
+        # from the start of the selection (a previous match), so matches can overlap
+        selected = self.anchor is not None
+        start = self.selection()[0] if selected else self.cursor
+        if forward:
+            # past a selected match, but a match right at the cursor counts
+            found = self.data.find(pattern, start + 1 if selected else start)
+            if found == -1 and wrap_around:
+                found = self.data.find(pattern)
+        else:
+            found = self.data.rfind(pattern, 0, start + len(pattern) - 1)
+            if found == -1 and wrap_around:
+                found = self.data.rfind(pattern)
+        if found == -1:
+            return False
+        self.select(found, found + len(pattern))
+        return True
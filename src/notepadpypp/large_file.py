@@ -0,0 +1,314 @@
+import bisect
+import mmap
+import re
+import time
+from array import array
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.Qsci import QsciScintilla
+
+import document_buffer
+
+
+class LineIndex(QObject):
+    """Sparse index of the lines of a memory-mapped file, built while the event loop is idle.
+
+    Only the number of lines before each BLOCK_SIZE block is kept (8 bytes per block), and
+    the exact start of a line is found by scanning the one block it's in."""
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    BLOCK_SIZE = 0x10000
+    READ_SIZE = 0x100000 # bytes counted per step
+
+    def __init__(self, data, time_budget_ms=15, parent=None):
+        super().__init__(parent)
+        self.data = data
+        self.time_budget = time_budget_ms / 1000
+        self.line_counts = array("Q", [0]) # lines before each block
+        self.indexed = 0 # bytes indexed so far
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.index_next_blocks)
+
+    @property
+    def complete(self):
+        return self.indexed >= len(self.data)
+
+    def start(self):
+        self.timer.start()
+
+    def cancel(self):
+        self.timer.stop()
+
+    def index_next_blocks(self):
+        started = time.perf_counter()
+        data, counts, size = self.data, self.line_counts, len(self.data)
+
+        while self.indexed < size and time.perf_counter() - started < self.time_budget:
+            chunk = data[self.indexed:self.indexed + self.READ_SIZE]
+            for start in range(0, len(chunk), self.BLOCK_SIZE):
+                counts.append(counts[-1] + chunk.count(b"\n", start, start + self.BLOCK_SIZE))
+            self.indexed += len(chunk)
+
+        if self.complete:
+            self.timer.stop()
+            self.finished.emit()
+        else:
+            self.progress.emit(self.indexed * 100 // size)
+
+    def line_count(self):
+        """Returns the number of lines indexed so far (all of them once complete)."""
+        return self.line_counts[-1] + 1 if self.complete else self.line_counts[-1]
+
+    def line_offset(self, line):
+        """Returns the byte offset where a line (0-based) starts, or None if it isn't indexed yet."""
+        if line == 0:
+            return 0
+        if line > self.line_counts[-1]:
+            return None
+
+        # the last block that starts before the line does
+        block = bisect.bisect_left(self.line_counts, line) - 1
+        start = block * self.BLOCK_SIZE
+        chunk = self.data[start:start + self.BLOCK_SIZE]
+        rest = chunk.split(b"\n", line - self.line_counts[block])[-1]
+        return start + len(chunk) - len(rest)
+
+    def line_at(self, offset):
+        """Returns the line (0-based) a byte offset is on, or None if it isn't indexed yet."""
+        if offset > self.indexed:
+            return None
+        block = min(offset // self.BLOCK_SIZE, len(self.line_counts) - 1)
+        start = block * self.BLOCK_SIZE
+        return self.line_counts[block] + self.data[start:offset].count(b"\n")
+
+
+class LargeFileView(QObject):
+    """Read-only view of a file too big to load, which shows a window of it in an editor.
+
+    The file is memory-mapped and the editor only ever holds WINDOW_SIZE bytes of it, which
+    slides a page at a time as the view scrolls near either end. Line numbers, Go To Line and
+    Find work on the whole file through the mapping and its LineIndex.
+
+    Lines are split on b"\\n", so encodings that don't encode it as that byte (UTF-16/32)
+    are shown as Latin-1. Regex searches run on the file's bytes, so case-folding
+    only applies to ASCII letters."""
+
+    PAGE_SIZE = 0x40000
+    WINDOW_SIZE = 4 * PAGE_SIZE
+    MAX_LINE_LENGTH = 0x10000 # longer lines are cut at the window edges
+    SEARCH_BLOCK = 0x100000 # bytes searched at a time going backwards
+    SEARCH_OVERLAP = 0x10000 # bytes past a block a match starting in it may run on to
+
+    def __init__(self, editor, file_path, encoding, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.file_path = file_path
+        self.encoding = self.viewable_encoding(encoding)
+
+        self.file = open(file_path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.file.close()
+            raise
+        self.size = len(self.data)
+        self.index = LineIndex(self.data, parent=self)
+        self.index.progress.connect(self.update_line_numbers)
+        self.index.finished.connect(self.update_line_numbers)
+
+        self.start = self.end = 0
+        self.first_line = 0 # line number of the window's first line, None while not indexed
+        self.identity = True # window bytes are the editor's bytes (valid UTF-8 files)
+        self.sliding = False
+
+        editor.setReadOnly(True)
+        editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+        editor.setMarginType(0, QsciScintilla.MarginType.TextMarginRightJustified)
+        editor.SCN_UPDATEUI.connect(self.check_window)
+
+    @staticmethod
+    def viewable_encoding(encoding):
+        encoding = {"utf_8_sig": "utf_8"}.get(encoding, encoding)
+        if not encoding or "\n".encode(encoding) != b"\n":
+            return "latin_1"
+        return encoding
+
+    def set_encoding(self, encoding):
+        self.encoding = self.viewable_encoding(encoding)
+        self.show_window(self.start)
+
+    def open(self):
+        self.show_window(0)
+        self.index.start()
+
+    def close(self):
+        self.index.cancel()
+        try:
+            self.data.close()
+        except BufferError:
+            # a match object still holds the mapping; it closes when that goes away
+            pass
+        self.file.close()
+
+    def show_window(self, start):
+        """Shows WINDOW_SIZE bytes of the file from the start of the line at start."""
+        start = max(0, min(start, self.size))
+        if start > 0:
+            line_start = self.data.rfind(b"\n", max(0, start - self.MAX_LINE_LENGTH), start) + 1
+            start = line_start or start
+        end = min(self.size, start + self.WINDOW_SIZE)
+        if end < self.size:
+            line_end = self.data.find(b"\n", end, end + self.MAX_LINE_LENGTH)
+            end = line_end + 1 if line_end != -1 else end
+
+        raw = self.data[start:end]
+        text = raw.decode(self.encoding, "replace").encode("utf-8")
+        self.identity = text == raw
+        del raw
+
+        editor = self.editor
+        editor.setReadOnly(False)
+        editor.SendScintilla(QsciScintilla.SCI_CLEARALL)
+        editor.SendScintilla(QsciScintilla.SCI_APPENDTEXT, len(text), text)
+        editor.setReadOnly(True)
+        editor.setModified(False)
+
+        self.start, self.end = start, end
+        self.first_line = self.index.line_at(start)
+        self.update_line_numbers()
+
+    def check_window(self):
+        """Slides the window a page when the view gets within a screen of either end of it."""
+        if self.sliding:
+            return
+        editor = self.editor
+        top = editor.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, editor.firstVisibleLine())
+        screen = editor.SendScintilla(QsciScintilla.SCI_LINESONSCREEN)
+
+        if top < screen and self.start > 0:
+            self.slide(self.start - self.PAGE_SIZE)
+        elif top + 2 * screen >= editor.lines() and self.end < self.size:
+            self.slide(self.start + self.PAGE_SIZE)
+        else:
+            self.update_line_numbers()
+
+    def slide(self, start):
+        """Moves the window, keeping the same lines on screen and the caret where it was."""
+        editor = self.editor
+        old_start = self.start
+        top = editor.firstVisibleLine()
+        line, index = editor.getCursorPosition()
+
+        self.sliding = True
+        try:
+            self.show_window(start)
+            if self.start >= old_start:
+                moved = self.data[old_start:self.start].count(b"\n")
+            else:
+                moved = -self.data[self.start:old_start].count(b"\n")
+
+            top, line = top - moved, line - moved
+            if not 0 <= line < editor.lines():
+                line, index = max(top, 0), 0
+            editor.setCursorPosition(line, index)
+            editor.setFirstVisibleLine(max(top, 0))
+        finally:
+            self.sliding = False
+        self.update_line_numbers()
+
+    def update_line_numbers(self):
+        """Numbers the lines on screen with their line numbers in the file."""
+        editor = self.editor
+        if self.first_line is None:
+            self.first_line = self.index.line_at(self.start)
+            if self.first_line is None:
+                return
+
+        total = self.index.line_count() if self.index.complete else self.first_line + editor.lines()
+        margin_width = editor.fontMetrics().horizontalAdvance("0" * len(str(total))) + 16
+        if editor.marginWidth(0) != margin_width:
+            editor.setMarginWidth(0, margin_width)
+
+        top = editor.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, editor.firstVisibleLine())
+        bottom = min(editor.lines(), top + editor.SendScintilla(QsciScintilla.SCI_LINESONSCREEN) + 1)
+        for line in range(top, bottom):
+            editor.setMarginText(line, str(self.first_line + line + 1), QsciScintilla.STYLE_LINENUMBER)
+
+    def position(self, offset):
+        """Returns the editor position of a byte offset in the window."""
+        if self.identity:
+            return offset - self.start
+        return len(self.data[self.start:offset].decode(self.encoding, "replace").encode("utf-8"))
+
+    def offset(self, position):
+        """Returns the byte offset in the file of an editor position."""
+        if self.identity:
+            return self.start + position
+        return self.start + len(document_buffer.read_text(self.editor, 0, position).encode(self.encoding, "replace"))
+
+    def select(self, anchor, caret):
+        """Selects a range of the file by byte offsets, moving the window to it if needed."""
+        low, high = min(anchor, caret), max(anchor, caret)
+        if (low < self.start + self.PAGE_SIZE and self.start > 0) or (high > self.end - self.PAGE_SIZE and self.end < self.size):
+            self.sliding = True
+            try:
+                self.show_window(low - self.WINDOW_SIZE // 2)
+            finally:
+                self.sliding = False
+        self.editor.SendScintilla(QsciScintilla.SCI_SETSEL, self.position(anchor), self.position(caret))
+        self.update_line_numbers()
+
+    def goto_line(self, line):
+        """Moves the caret to a line (0-based). Returns False if the line isn't indexed yet."""
+        offset = self.index.line_offset(line)
+        if offset is None:
+            return False
+        self.select(offset, offset)
+        return True
+
+    def find(self, pattern_source, flags, forward=True, wrap_around=False):
+        """Finds a regular expression in the file from the caret on, searching the mapping
+        itself, and selects the match. Returns the match, or None."""
+        try:
+            pattern = re.compile(pattern_source.encode(self.encoding), flags)
+        except UnicodeEncodeError:
+            # there's nothing in the file it could match
+            return None
+
+        position = self.offset(self.editor.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS))
+        if forward:
+            match = pattern.search(self.data, position)
+            if not match and wrap_around:
+                match = pattern.search(self.data)
+        else:
+            match = self.search_backward(pattern, position)
+            if not match and wrap_around:
+                match = self.search_backward(pattern, self.size)
+
+        if match:
+            if forward:
+                self.select(match.start(), match.end())
+            else:
+                self.select(match.end(), match.start())
+        return match
+
+    def search_backward(self, pattern, position):
+        """Returns the last match that starts before position, a block at a time. Each block
+        is only scanned SEARCH_OVERLAP bytes past its end, so a search that finds nothing stays
+        linear in the size of the file. Matches running on further than that may be cut short."""
+        end = position
+        while end > 0:
+            begin = max(0, end - self.SEARCH_BLOCK)
+            last = None
+            for match in pattern.finditer(self.data, begin, min(end + self.SEARCH_OVERLAP, position)):
+                if match.start() >= end:
+                    break
+                last = match
+            if last is not None:
+                return last
+            end = begin
+        return None
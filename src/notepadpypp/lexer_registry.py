@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import pickle
+
+from config import CONFIG_PATH
+
+LEXER_DIR = os.path.join(os.path.dirname(__file__), "lexer")
+REGISTRY_PATH = os.path.join(os.path.dirname(CONFIG_PATH), "lexer_registry.cache")
+
+# bump whenever the layout of the cached data changes
+REGISTRY_VERSION = 1
+
+
+class LexerRegistry:
+    """Language definitions (*_lang.json) and style tables (<name>.json) from the lexer directory,
+    cached on disk so startup reads one file instead of parsing every JSON file.
+
+    Cached files are validated against each source file's mtime and size, and by content hash
+    when those changed, so only files that really changed are parsed again. Definitions are
+    kept pickled until a language is first used; startup only needs the names and extensions."""
+
+    def __init__(self, lexer_dir=LEXER_DIR, registry_path=REGISTRY_PATH):
+        self.lexer_dir = lexer_dir
+        self.registry_path = registry_path
+
+        # file name -> {"source": [mtime_ns, size, sha1], "name": ..., "extensions": [...],
+        # "data": pickled definition or style table, None if it failed to parse}
+        self.files = {}
+        self.languages = {} # language name -> file name
+        self.extensions = {} # extension -> language name
+        self.style_files = {} # style table name -> file name
+        self._loaded = {}
+
+        self.load()
+
+    def load(self):
+        cached = self.read_cache()
+        changed = cached is None
+        cached_files = cached["files"] if cached else {}
+
+        for file_name, (mtime, size) in self.scan().items():
+            cached_file = cached_files.get(file_name)
+            if cached_file is not None and cached_file["source"][:2] == [mtime, size]:
+                self.files[file_name] = cached_file
+                continue
+
+            try:
+                with open(os.path.join(self.lexer_dir, file_name), "rb") as file:
+                    data = file.read()
+            except OSError as e:
+                print(f"Failed to read lexer file {file_name}: {e}")
+                continue
+
+            digest = hashlib.sha1(data).hexdigest()
+            changed = True
+
+            if cached_file is not None and cached_file["source"][2] == digest:
+                # touched but not changed
+                self.files[file_name] = dict(cached_file, source=[mtime, size, digest])
+            else:
+                self.files[file_name] = self.parse(file_name, data)
+                self.files[file_name]["source"] = [mtime, size, digest]
+
+        if changed or self.files.keys() != cached_files.keys():
+            self.build_maps()
+            self.write_cache()
+        else:
+            self.languages = cached["languages"]
+            self.extensions = cached["extensions"]
+            self.style_files = cached["style_files"]
+
+    def scan(self):
+        """Returns the mtime and size of every JSON file in the lexer directory."""
+        files = {}
+        try:
+            with os.scandir(self.lexer_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return dict(sorted(files.items()))
+
+    def parse(self, file_name, data):
+        is_language = file_name.endswith("_lang.json")
+        name = file_name[:-len("_lang.json")] if is_language else file_name[:-len(".json")]
+        parsed = {"name": name, "extensions": [], "data": None}
+
+        try:
+            data = json.loads(data.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            print(f"Failed to load lexer file {file_name}: {e}")
+            return parsed
+
+        if not isinstance(data, dict):
+            print(f"Failed to load lexer file {file_name}: expected a JSON object")
+            return parsed
+
+        if is_language:
+            parsed["name"] = data.get("name", name)
+            parsed["extensions"] = data.get("extensions", [])
+        elif not any(isinstance(v, dict) for v in data.values()):
+            data = {k: {"color": v} for k, v in data.items()}
+
+        parsed["data"] = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        return parsed
+
+    def build_maps(self):
+        self.languages = {}
+        self.extensions = {}
+        self.style_files = {}
+
+        for file_name, parsed in self.files.items():
+            if parsed["data"] is None:
+                continue
+
+            if file_name.endswith("_lang.json"):
+                self.languages[parsed["name"]] = file_name
+                for ext in parsed["extensions"]:
+                    self.extensions[ext] = parsed["name"]
+            else:
+                self.style_files[parsed["name"]] = file_name
+
+    def _load(self, file_name):
+        data = self._loaded.get(file_name)
+        if data is None:
+            data = self._loaded[file_name] = pickle.loads(self.files[file_name]["data"])
+        return data
+
+    def get_config(self, lang_name):
+        """Returns the parsed *_lang.json config of a language."""
+        return self._load(self.languages[lang_name])
+
+    def get_extensions(self, lang_name):
+        return self.files[self.languages[lang_name]]["extensions"]
+
+    def get_styles(self, lexer_name):
+        """Returns the style table for a lexer class name (without the QsciLexer prefix)."""
+        if lexer_name.endswith("Lexer") and lexer_name[:-len("Lexer")] in self.languages:
+            lexer_name = lexer_name[:-len("Lexer")]
+
+        if lexer_name in self.languages:
+            config = self.get_config(lexer_name)
+            if "styles" in config:
+                return config["styles"]
+            elif "colors" in config:
+                return {k: {"color": v} for k, v in config["colors"].items()}
+
+        lexer_name = lexer_name.replace("Lexer", "")
+        if lexer_name.startswith("custom_lexers"):
+            lexer_name = lexer_name.split(".")[-1]
+
+        if lexer_name not in self.style_files:
+            return {}
+        return self._load(self.style_files[lexer_name])
+
+    def read_cache(self):
+        try:
+            with open(self.registry_path, "rb") as file:
+                cached = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable lexer registry cache: {e}")
+            return None
+
+        if not isinstance(cached, dict) or cached.get("version") != REGISTRY_VERSION or cached.get("lexer_dir") != self.lexer_dir:
+            return None
+        return cached
+
+    def write_cache(self):
+        cached = {
+            "version": REGISTRY_VERSION,
+            "lexer_dir": self.lexer_dir,
+            "files": self.files,
+            "languages": self.languages,
+            "extensions": self.extensions,
+            "style_files": self.style_files,
+        }
+
+        temp_path = f"{self.registry_path}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                pickle.dump(cached, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.registry_path)
+        except OSError as e:
+            print(f"Failed to write lexer registry cache: {e}")
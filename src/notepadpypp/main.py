@@ -5,8 +5,10 @@ import platform
 import shutil
 import json
 import re
-import hashlib 
 import time 
+import codecs
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import Optional, Dict, Any
 
@@ -17,7 +19,7 @@ try:
 
     from PyQt6.QtWidgets import (
         QApplication, QMainWindow, QFileDialog, QMessageBox, 
-        QTabWidget, QInputDialog, QDialog, QMenuBar, QMenu
+        QTabWidget, QInputDialog, QDialog, QMenuBar, QMenu, QProgressBar
     )
 
     from PyQt6.QtCore import QCoreApplication, Qt, QSize, QTimer
@@ -31,31 +33,27 @@ except ImportError as e:
     print(f"Scintilla import failed! {e}")
     raise SystemExit("QsciScintilla is required to run Notepad8. Please refer to your distro's manual for instructions.")
 
-print_support = True
-network_support = True 
-# used numbers
-used_numbers = set()
+# QtPrintSupport, QtNetwork and charset_normalizer (through encoding_detection) are imported
+# where they're first used, so none of them hold up the first window
 
-try:
-    from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
-except ImportError:
-    print_support = False 
-    print(f"Failed to import QtPrintSupport. {e}\nPrinting functions will be unavailable.")
-
-try:
-    from PyQt6.QtNetwork import QLocalServer, QLocalSocket
-except ImportError:
-    network_support = False 
-    print(f"Failed to import QtNetwork. {e}\nNetworking functions will be unavailable.")
-
-from config import Config, CONFIG_PATH
+from config import Config, CONFIG_PATH, DEFAULT_CONFIG
 from plugin_api import PluginAPI
-from file_types import get_lexer_for_file, DEFAULT_LANGUAGES
+from file_types import get_language_for_file, DEFAULT_LANGUAGES
 from plugin_manager import PluginManager
 from dialogs import SearchDialog
-
-# additional projects go here
-from charset_normalizer import from_bytes
+from background_styler import BackgroundStyler
+from encoding_detection import EncodingDetector
+from file_loader import FileLoader, load_text, mark_modified
+from file_batch import FileBatch, read_file
+from file_history import FileHistory
+from untitled_numbers import UntitledNumbers, untitled_number
+from backup_store import BackupStore
+from edit_journal import EditJournal, JournalWriter, replay
+from file_saver import FileSaver
+from large_file import LargeFileView
+from hex_view import HexView, parse_byte_pattern
+from tab_placeholder import TabPlaceholder
+import document_buffer
 
 class NotepadPy(QMainWindow):
     def __init__(self):
@@ -66,12 +64,36 @@ class NotepadPy(QMainWindow):
         os.makedirs(self.backup_path, exist_ok=True)
 
         self.config = Config(CONFIG_PATH)
+        self.file_history = FileHistory()
+        self.untitled_numbers = UntitledNumbers()
+        self.setup_config_timer()
+        self.backup_store = BackupStore(self.backup_path)
         self.file_paths = {}
-        self.backup_files = {}
         self.modified_tabs = {}
         self.tab_settings = {}
+        self.background_stylers = {}
+        self.file_encodings = {}
+        self.file_loaders = {}
+        self.file_savers = {}
+        self.large_files = {}
+        self.encoding_detector = EncodingDetector()
+        self.file_pool = ThreadPoolExecutor(
+            max_workers=self.config.get("fileWorkers", DEFAULT_CONFIG["fileWorkers"]), thread_name_prefix="files"
+        )
+        self.file_batches = set()
+        self.tab_activity = {} # editor -> time.monotonic() it was last shown
+        self.pending_backups = set() # editors with a backup being written on the file pool
+        self.journals = {} # editor -> EditJournal of its edits since its last backup
+        self.journal_writer = JournalWriter()
+
+        # opens restored tabs next to the current one while the window is idle
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(1000)
+        self.prefetch_timer.timeout.connect(self.prefetch_tabs)
         self.new_file_counter = 1
         self.last_search_options = None
+        self.last_byte_search = ""
         self.current_language = "None"
         self.last_replace_text = ""
 
@@ -82,9 +104,13 @@ class NotepadPy(QMainWindow):
         self.init_ui()
         self.plugin_manager.load_plugins()
 
+        if not self.backup_store.exists:
+            self.migrate_backups()
         self.restore_session()
         self.cleanup_orphaned_backups()
         self.setup_backup_timer()
+        self.setup_journal_timer()
+        self.setup_hibernate_timer()
 
     def init_ui(self):
         """Initialize the main user interface."""
@@ -108,6 +134,12 @@ class NotepadPy(QMainWindow):
         # create toolbar
         self.create_toolbar()
 
+        # progress of opening or saving many files at once
+        self.batch_progress = QProgressBar()
+        self.batch_progress.setMaximumWidth(200)
+        self.batch_progress.hide()
+        self.statusBar().addPermanentWidget(self.batch_progress)
+
     def create_menu_bar(self):
         """Initialize the menu bar, and populate it with menus/actions."""
         menu_bar = self.menuBar()
@@ -121,6 +153,7 @@ class NotepadPy(QMainWindow):
             ("Save As...", "Ctrl+Shift+S", self.save_current_file_as, "icons/save_as.png"),
             ("Save Copy...", "Ctrl+Shift+F6", self.save_current_file_as_copy, "icons/save.png"),
             ("Save All", "Ctrl+Shift+Alt+S", self.save_all_files, "icons/save_all.png"),
+            ("Reopen with Encoding...", None, self.reopen_with_encoding, None),
             (None, None, None, None), 
             ("Close", "Ctrl+W", self.close_current_tab, None),
             ("Close All", None, self.close_all_tabs, None),
@@ -265,55 +298,307 @@ class NotepadPy(QMainWindow):
             action.setToolTip(tooltip)
             toolbar.addAction(action)
 
+    def backup_snapshot(self, editor):
+        """Returns what a backup of the editor would write, as (key, generation, data), or
+        None if the document hasn't changed since its last backup."""
+        if self.tabs.indexOf(editor) == -1 or editor in self.file_loaders or editor in self.large_files:
+            return None
+
+        key = self.backup_key(editor)
+
+        # saving the file drops its backup, so that's written again even without new edits
+        generation = editor.modification_generation
+        if generation == editor.backup_generation and key in self.backup_store:
+            return None
+
+        # copied, as the document can change while the backup is written
+        return key, generation, document_buffer.read_bytes(editor)
+
+    def backup_key(self, editor):
+        """What the backup store knows a tab's document by: its file's full path, or for new
+        tabs the path their backup had before there was a backup store."""
+        file_path = self.get_tab_file_path(editor)
+        if file_path:
+            return file_path
+        tab_title = self.tabs.tabText(self.tabs.indexOf(editor)).replace("&", "").lstrip("*")
+        return os.path.join(self.backup_path, f"{tab_title}.bak")
+
     def save_backup(self, editor):
-        """Saves or updates a backup of a modified document."""
-        tab_index = self.tabs.indexOf(editor)
-        if tab_index == -1:
+        """Saves or updates a backup of a modified document right away, if it changed since
+        the last one."""
+        snapshot = self.backup_snapshot(editor)
+        if snapshot is None:
             return
 
-        tab_title = self.tabs.tabText(tab_index).replace("&", "").lstrip("*")
-        content = editor.text()
+        key, generation, data = snapshot
+        digest = self.backup_store.write_blob(data)
+        if self.backup_written(editor, key, generation, data, key, digest):
+            self.config.save()
+        self.commit_backups()
+
+    def backup_written(self, editor, key, generation, data, file_path, digest):
+        """Records a backup once its blob is on disk and starts the document's journal over
+        on it. Returns whether the file's session entry changed and the config needs saving."""
+        if self.tabs.indexOf(editor) == -1:
+            # closed while it was written, taking its backups with it
+            self.backup_store.discard(digest)
+            self.drop_journal(editor)
+            return False
+
+        editor.backup_generation = generation
+        self.backup_store.set(key, digest)
+        self.plugin_api.log(f"Backup saved for: {key}")
+
+        journal = self.journals.get(editor)
+        if journal is not None and journal.path == self.backup_store.journal_path(key):
+            self.journal_writer.rewrite(journal.path, data, journal.rebase(generation))
 
         original_path = self.get_tab_file_path(editor)
-        if original_path:
-            backup_base_name = os.path.basename(original_path)
-        else:
-            backup_base_name = tab_title
+        if not original_path:
+            return False
+        return self.record_open_file(
+            original_path,
+            is_modified=editor.isModified(),
+            caret_position=editor.getCursorPosition(),
+            lexer=self.get_lexer_for_editor(editor)
+        )
 
-        if not backup_base_name.endswith(".bak"):
-            backup_base_name += ".bak"
+    def record_open_file(self, file_path, **state):
+        """Updates a file's session entry without saving the config. Returns whether
+        anything in it changed."""
+        state["caret_position"] = list(state["caret_position"])
+        file_info = self.config.get_open_file(file_path)
+        if file_info is not None:
+            # tuples come back from config.json as lists
+            current = dict(file_info, caret_position=list(file_info.get("caret_position", ())))
+            if all(current.get(name) == value for name, value in state.items()):
+                return False
+
+        self.config.add_open_file(file_path, save=False, **state)
+        return True
 
-        backup_file = os.path.join(self.backup_path, backup_base_name)
+    def setup_config_timer(self):
+        """Setup a timer so the config and file history are written once for all the changes
+        made within half a second of each other, rather than on every change, and written
+        before quitting."""
+        self.config_timer = QTimer(self)
+        self.config_timer.setSingleShot(True)
+        self.config_timer.setInterval(500)
+        self.config_timer.timeout.connect(self.flush_config)
+        self.config.schedule_save = self.schedule_config_save
+        self.file_history.schedule_save = self.schedule_config_save
+        QApplication.instance().aboutToQuit.connect(self.save_on_quit)
+
+    def schedule_config_save(self):
+        # not restarted, so a steady stream of changes still gets written every interval
+        if not self.config_timer.isActive():
+            self.config_timer.start()
+
+    def flush_config(self):
+        self.config_timer.stop()
+        try:
+            self.config.flush()
+            self.file_history.flush()
+        except OSError as e:
+            self.plugin_api.log(f"Failed to save config: {e}")
 
-        content_hash = hashlib.md5(content.encode("utf-8")).hexdigest()
-        last_hash = getattr(editor, "last_backup_hash", None)
-        last_backup_time = getattr(editor, "last_backup_time", 0)
+    def save_on_quit(self):
+        for i in range(self.tabs.count()):
+            self.remember_view_state(self.tabs.widget(i))
+        self.flush_config()
 
-        if content_hash == last_hash and (time.time() - last_backup_time) < 60:
+    def remember_view_state(self, editor):
+        """Records how a file's tab is viewed in the file history, to restore when it's next opened."""
+        file_path = self.get_tab_file_path(editor)
+        if (
+            not isinstance(editor, QsciScintilla) or not file_path or self.is_temp_backup(file_path)
+            or editor in self.file_loaders or editor in self.large_files
+        ):
             return
 
-        with open(backup_file, "w", encoding="utf-8") as file:
-            file.write(content)
+        folds = []
+        line = editor.SendScintilla(QsciScintilla.SCI_CONTRACTEDFOLDNEXT, 0)
+        while line != -1:
+            folds.append(line)
+            line = editor.SendScintilla(QsciScintilla.SCI_CONTRACTEDFOLDNEXT, line + 1)
+
+        self.file_history.record(file_path, {
+            "caret_position": list(editor.getCursorPosition()),
+            "first_visible_line": editor.firstVisibleLine(),
+            "folds": folds,
+            "lexer": self.get_lexer_for_editor(editor),
+        })
+
+    def restore_folds(self, editor, folds):
+        """Folds the given lines again, where they're still fold headers."""
+        if not folds:
+            return
+        # fold levels come from the lexer, so style as far as the last fold first
+        editor.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, editor.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, folds[-1]))
+        for line in folds:
+            if editor.SendScintilla(QsciScintilla.SCI_GETFOLDLEVEL, line) & QsciScintilla.SC_FOLDLEVELHEADERFLAG:
+                editor.SendScintilla(QsciScintilla.SCI_FOLDLINE, line, QsciScintilla.SC_FOLDACTION_CONTRACT)
+
+    def setup_journal_timer(self):
+        """Setup a timer to write the edits made since the last tick to the journals, and to
+        write the journals out before the application quits."""
+        self.journal_timer = QTimer(self)
+        self.journal_timer.timeout.connect(self.flush_journals)
+        self.journal_timer.start(500)
+        QApplication.instance().aboutToQuit.connect(functools.partial(self.flush_journals, True))
+
+    def journal_edit(self, editor, position, modification_type, length):
+        """Records an insert or delete in the document's journal. Edits made before its
+        backup is taken are part of the backup, so they're only kept from when the backup
+        starts being written."""
+        if self.tabs.indexOf(editor) == -1 or editor in self.file_loaders or editor in self.large_files:
+            return
 
-        editor.last_backup_hash = content_hash
-        editor.last_backup_time = time.time()
-        self.plugin_api.log(f"Backup saved to: {backup_file}")
+        journal = self.journals.get(editor)
+        path = self.backup_store.journal_path(self.backup_key(editor))
+        if journal is None or journal.path != path:
+            if journal is not None:
+                # saved under another name; the old backup is no longer its base
+                self.journal_writer.remove(journal.path)
+            journal = self.journals[editor] = EditJournal(path)
+        if journal.base_generation is None and editor not in self.pending_backups:
+            return
 
-        if original_path:
-            self.plugin_api.log(f"Saving backup for {original_path} as {backup_file}")
-            self.backup_files[original_path] = backup_file
+        generation = editor.modification_generation
+        if modification_type & QsciScintilla.SC_MOD_INSERTTEXT:
+            # the text the notification carries stops at the first NUL, so it's read back from the document
+            journal.insert(generation, position, document_buffer.read_bytes(editor, position, position + length))
         else:
-            self.backup_files[tab_title] = backup_file
-
-        if original_path:
-            self.config.add_open_file(
-                file_path=original_path,
-                is_modified=editor.isModified(),
-                caret_position=editor.getCursorPosition(),
-                lexer=self.get_lexer_for_editor(editor)
-            )
+            journal.delete(generation, position, length)
+
+    def flush_journals(self, wait=False):
+        """Hands the edits made since the last flush to the journal writer. Documents without
+        a backup to journal on, and journals past journalCompactSize, get a new backup."""
+        compact_size = self.config.get("journalCompactSize", DEFAULT_CONFIG["journalCompactSize"])
+        needs_backup = []
+        for editor, journal in self.journals.items():
+            data = journal.take_unflushed()
+            if data:
+                self.journal_writer.append(journal.path, data)
+            if journal.base_generation is None and editor.isModified() or journal.size > compact_size:
+                needs_backup.append(editor)
+
+        if needs_backup:
+            self.save_backups(needs_backup)
+        if wait:
+            self.journal_writer.wait()
+
+    def drop_journal(self, editor):
+        """Removes a document's journal, for when its backup goes away."""
+        journal = self.journals.pop(editor, None)
+        if journal is not None:
+            self.journal_writer.remove(journal.path)
+
+    def recover_journal(self, key):
+        """Applies the journal of a document's backup to it, so it holds the edits made after
+        it was written. Returns whether there were any."""
+        # anything still on its way to the journal is part of it
+        self.journal_writer.wait()
+        path = self.backup_store.journal_path(key)
+        base = self.backup_store.read(key)
+        recovered = None if base is None else replay(path, base)
+        if recovered is not None:
+            self.backup_store.put(key, recovered)
+            self.commit_backups()
+            self.plugin_api.log(f"Recovered edits to {key} from its journal")
+
+        # applied, or left over from an older backup
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return recovered is not None
+
+    def start_journal(self, editor, key, data):
+        """Starts a tab's journal on the backup it was just opened from."""
+        journal = self.journals[editor] = EditJournal(self.backup_store.journal_path(key))
+        self.journal_writer.rewrite(journal.path, data, journal.rebase(editor.modification_generation))
+
+    def setup_hibernate_timer(self):
+        """Setup a timer to periodically hibernate tabs that haven't been used in a while."""
+        self.hibernate_timer = QTimer(self)
+        self.hibernate_timer.timeout.connect(self.hibernate_idle_tabs)
+        self.hibernate_timer.start(30000)
+
+    def hibernate_idle_tabs(self):
+        """Hibernates tabs not shown for hibernateAfter seconds, and the least recently shown
+        ones while the editors hold more than hibernateBudget bytes of text."""
+        idle_limit = self.config.get("hibernateAfter", DEFAULT_CONFIG["hibernateAfter"])
+        budget = self.config.get("hibernateBudget", DEFAULT_CONFIG["hibernateBudget"])
+        editors = [
+            self.tabs.widget(i) for i in range(self.tabs.count())
+            if isinstance(self.tabs.widget(i), QsciScintilla)
+        ]
+        total = sum(editor.SendScintilla(QsciScintilla.SCI_GETLENGTH) for editor in editors)
+        now = time.monotonic()
+
+        current = self.tabs.currentWidget()
+        candidates = sorted(
+            (editor for editor in editors if editor is not current and self.can_hibernate(editor)),
+            # tabs that were never shown count from when they're first seen here
+            key=lambda editor: self.tab_activity.setdefault(editor, now)
+        )
+        for editor in candidates:
+            idle = now - self.tab_activity[editor]
+            if (idle_limit and idle >= idle_limit) or (budget and total > budget):
+                size = editor.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+                if self.hibernate_tab(editor):
+                    total -= size
+
+    def can_hibernate(self, editor):
+        """Whether the editor is only holding a document that can be opened again as it is."""
+        return (
+            editor in self.file_paths
+            and editor not in self.file_loaders
+            and editor not in self.file_savers
+            and editor not in self.large_files
+            and editor not in self.pending_backups
+        )
 
-        self.config.save()
+    def hibernate_tab(self, editor):
+        """Frees a tab's editor, leaving a placeholder that opens it again with its caret,
+        scroll position and lexer when it's next shown. Modified documents (and new ones,
+        which only exist in their backup) are written to their backup first. Returns whether
+        the tab was hibernated."""
+        file_path = self.get_tab_file_path(editor)
+        is_modified = editor.isModified()
+        try:
+            if is_modified or self.is_temp_backup(file_path):
+                self.save_backup(editor)
+            else:
+                # a leftover backup would be opened instead of the file
+                if self.backup_store.remove(file_path):
+                    self.commit_backups()
+        except OSError as e:
+            self.plugin_api.log(f"Not hibernating {file_path}, its backup failed: {e}")
+            return False
+
+        placeholder = TabPlaceholder({
+            "file_path": file_path,
+            "is_modified": is_modified,
+            "caret_position": editor.getCursorPosition(),
+            "first_visible_line": editor.firstVisibleLine(),
+            "lexer": self.get_lexer_for_editor(editor),
+            "encoding": self.file_encodings.get(editor),
+        })
+        # folds are only kept in the file history
+        self.remember_view_state(editor)
+        index = self.tabs.indexOf(editor)
+        self.tabs.insertTab(index, placeholder, self.tabs.tabIcon(index), self.tabs.tabText(index))
+
+        # without a path or changes the editor closes without touching its session entry or backup
+        self.set_tab_file_path(placeholder, self.file_paths.pop(editor))
+        editor.setModified(False)
+        self.close_tab(self.tabs.indexOf(editor))
+        editor.deleteLater()
+
+        self.plugin_api.log(f"Hibernated {file_path}")
+        return True
 
     def setup_backup_timer(self):
         """Setup a timer to periodically save backups."""
@@ -322,96 +607,239 @@ class NotepadPy(QMainWindow):
         self.backup_timer.start(60000)
     
     def save_all_backups(self):
-        """Save backups for the modified documents"""
-        for i in range(self.tabs.count()):
-            editor = self.tabs.widget(i)
-            if isinstance(editor, QsciScintilla) and editor.isModified():
-                self.save_backup(editor)
+        """Save backups for the modified documents."""
+        self.save_backups(
+            self.tabs.widget(i) for i in range(self.tabs.count())
+            if isinstance(self.tabs.widget(i), QsciScintilla) and self.tabs.widget(i).isModified()
+        )
+
+    def save_backups(self, editors):
+        """Save backups for the documents that changed since their last backup. They're
+        written on the file thread pool from snapshots, and the config is saved once at the
+        end if any session entries changed."""
+        batch = FileBatch(self.file_pool, parent=self)
+        editors = [editor for editor in editors if editor not in self.pending_backups]
+        changed = []
+
+        def written(editor, key, generation, data, file_path, digest):
+            if self.backup_written(editor, key, generation, data, file_path, digest):
+                changed.append(file_path)
+
+        for editor in list(editors):
+            snapshot = self.backup_snapshot(editor)
+            if snapshot is None:
+                editors.remove(editor)
+                continue
+
+            key, generation, data = snapshot
+            self.pending_backups.add(editor)
+            batch.run(key, lambda key, data=data: self.backup_store.write_blob(data), functools.partial(written, editor, key, generation, data))
+
+        def finished():
+            self.pending_backups.difference_update(editors)
+            for file_path, error in batch.errors:
+                self.plugin_api.log(f"Failed to save backup of {file_path}: {error}")
+            if changed:
+                self.config.save()
+            try:
+                self.commit_backups()
+            except OSError as e:
+                self.plugin_api.log(f"Failed to save the backup index: {e}")
+            batch.deleteLater()
+
+        batch.finished.connect(finished)
+        batch.close()
+
+    def commit_backups(self):
+        """Saves the backup index if it changed, then deletes the blobs it no longer refers
+        to, unless backups are still being written (which may be writing those blobs again)."""
+        if self.backup_store.dirty:
+            self.backup_store.save_index()
+        if not self.pending_backups:
+            self.backup_store.collect()
 
     def restore_session(self):
-        """Restore open files from the previous session."""
-        backup_files = os.listdir(self.backup_path)
-        self.plugin_api.log(f"Backup files found in directory: {backup_files}")
+        """Restore open files from the previous session. Tabs come back as placeholders, and
+        a tab's file is only read the first time it's shown."""
+        self.plugin_api.log(f"Backups found in the index: {len(self.backup_store.entries)}")
 
+        # new tabs only exist in the backup store
         open_files = [
-            f for f in self.config.get("open_files", [])
-            if os.path.exists(f["file_path"])
+            f for f in self.config.get_open_files()
+            if f["file_path"] in self.backup_store or os.path.exists(f["file_path"])
         ]
-        self.config.data["open_files"] = open_files
+        self.config.set_open_files(open_files)
         self.config.save()
 
-        restored_any = False
+        unmodified_icon = QIcon("icons/text.png")
+        modified_icon = QIcon("icons/text_modified.png")
 
+        # the tabs are only opened once the last one is made current
+        self.tabs.blockSignals(True)
         for file_info in open_files:
             file_path = file_info["file_path"]
-            is_modified = file_info.get("is_modified", False)
-            caret_position = file_info.get("caret_position", (0, 0))
-            lexer = file_info.get("lexer", "None")
+            if self.is_temp_backup(file_path):
+                tab_title = os.path.splitext(os.path.basename(file_path))[0]
+                number = untitled_number(tab_title)
+                if number is not None:
+                    self.untitled_numbers.take(number)
+            else:
+                tab_title = os.path.basename(file_path)
 
-            try:
-                is_temp_backup = (
-                    file_path.endswith(".bak") and # check for 'new '?
-                    os.path.dirname(file_path) == self.backup_path
-                )
+            placeholder = TabPlaceholder(file_info)
+            is_modified = placeholder.is_modified
+            index = self.tabs.addTab(placeholder, f"*{tab_title}" if is_modified else tab_title)
+            self.tabs.setTabIcon(index, modified_icon if is_modified else unmodified_icon)
+            self.set_tab_file_path(placeholder, file_path)
+        self.tabs.blockSignals(False)
 
-                if is_temp_backup:
-                    with open(file_path, "r", encoding="utf-8") as fh:
-                        content = fh.read()
-                    tab_title = os.path.splitext(os.path.basename(file_path))[0]
+        if self.tabs.count() == 0:
+            self.plugin_api.log("no files to restore; opening new blank tab")
+            self.add_new_tab()
+            return
 
-                    editor = self.add_new_tab(content, tab_title, file_name=file_path)
-                
-                else:
-                    backup_name = f"{os.path.basename(file_path)}.bak"
-                    backup_file = os.path.join(self.backup_path, backup_name)
-                    
-                    if os.path.exists(backup_file):
-                        with open(backup_file, "r", encoding="utf-8") as fh:
-                            content = fh.read()
-                        self.plugin_api.log(f"Restoring {file_path} from backup {backup_file}")
-                    elif os.path.exists(file_path):
-                        with open(file_path, "r", encoding="utf-8") as fh:
-                            content = fh.read()
-                        self.plugin_api.log(f"Restoring {file_path} from original file")
-                    else:
-                        self.plugin_api.log(f"No backup or original for {file_path}. Removing from config.")
-                        self.config.remove_open_file(file_path)
-                        continue
-
-                    tab_title = os.path.basename(file_path)
-                    editor = self.add_new_tab(content, tab_title, file_name=file_path)
-
-                editor.blockSignals(True)
-                editor.setText(content)
-                editor.blockSignals(False)
-
-                if is_modified:
-                    editor.setModified(True)
-                if caret_position:
-                    editor.setCursorPosition(*caret_position)
-
-                if hasattr(editor, '_margin_timer'):
-                    editor._margin_timer.timeout.emit()
-
-                if lexer and lexer != "None":
-                    self.set_language(lexer)
+        self.plugin_api.log(f"Restored {self.tabs.count()} tab(s)")
+        self.tabs.setCurrentIndex(self.tabs.count() - 1)
+        self.update_title_on_tab_change(self.tabs.currentIndex())
+
+    def is_temp_backup(self, file_path):
+        return (
+            file_path.endswith(".bak") and # check for 'new '?
+            os.path.dirname(file_path) == self.backup_path
+        )
+
+    def restore_file(self, file_info, file_path):
+        """Opens a file from the previous session in a new tab, from its backup if it has one,
+        and puts back its modified state, caret and lexer."""
+        is_modified = file_info.get("is_modified", False)
+        caret_position = file_info.get("caret_position", (0, 0))
+        lexer = file_info.get("lexer", "None")
+        # known for tabs that were hibernated, not ones from the last session
+        known_encoding = file_info.get("encoding")
+        first_line = file_info.get("first_visible_line")
+
+        try:
+            data, encoding = None, None
+            if file_path in self.backup_store:
+                if self.recover_journal(file_path):
+                    is_modified = True
+                data = self.backup_store.read(file_path)
+
+            if self.is_temp_backup(file_path):
+                tab_title = os.path.splitext(os.path.basename(file_path))[0]
+                encoding = "utf_8"
+                if data is None:
+                    self.plugin_api.log(f"No backup for {file_path}. Removing from config.")
+                    self.config.remove_open_file(file_path)
+                    return
+
+            else:
+                if data is not None:
+                    # the original's encoding is kept for saving
+                    encoding = known_encoding or self.get_file_encoding_override(file_path) or self.encoding_detector.detect(file_path)
+                    self.plugin_api.log(f"Restoring {file_path} from its backup")
+                elif os.path.exists(file_path):
+                    encoding = known_encoding or self.get_file_encoding_override(file_path) or self.encoding_detector.detect(file_path)
+                    self.plugin_api.log(f"Restoring {file_path} from original file")
+                    if encoding is None:
+                        self.open_hex_file(file_path)
+                        return
+                    if self.is_large_file(file_path):
+                        self.open_large_file(file_path, encoding)
+                        return
                 else:
-                    self.set_language("None")
+                    self.plugin_api.log(f"No backup or original for {file_path}. Removing from config.")
+                    self.config.remove_open_file(file_path)
+                    return
+
+                tab_title = os.path.basename(file_path)
+
+            editor = self.add_new_tab("", tab_title, file_name=file_path)
+            if data is not None:
+                # backups are kept as UTF-8
+                load_text(editor, data)
+                self.restore_tab_state(editor, encoding, is_modified, caret_position, lexer, first_line)
+                # the backup is current until it's edited
+                editor.backup_generation = editor.modification_generation
+                self.start_journal(editor, file_path, data)
+                return
 
-                self.set_language(lexer)
-                restored_any = True
-                
-            except Exception as e:
-                self.plugin_api.log(f"Failed to restore {file_path or backup_name}: {e}")
+            self.load_file(
+                editor, file_path, encoding,
+                functools.partial(self.restore_tab_state, editor, encoding, is_modified, caret_position, lexer, first_line),
+                errors="replace" if self.get_file_encoding_override(file_path) else "strict"
+            )
 
-        if not restored_any:
-            self.plugin_api.log("no files to restore; opening new blank tab")
-            self.add_new_tab()
+        except Exception as e:
+            self.plugin_api.log(f"Failed to restore {file_path}: {e}")
+
+    def materialize_tab(self, placeholder):
+        """Opens a restored tab's file in place of its placeholder, leaving the current tab
+        as it was unless that was the placeholder. Returns the new tab's widget, or None if
+        the file couldn't be opened."""
+        index = self.tabs.indexOf(placeholder)
+        current = self.tabs.currentWidget()
+        self.replace_tab(placeholder, functools.partial(self.restore_file, placeholder.file_info))
+
+        if self.tabs.indexOf(placeholder) != -1:
+            # left in place, so closing it keeps the file's backup
+            placeholder.show_error(f"{self.get_tab_file_path(placeholder)} could not be opened.")
+            return None
+
+        widget = self.tabs.widget(index)
+        self.tab_activity[widget] = time.monotonic()
+        if current is not placeholder and self.tabs.indexOf(current) != -1:
+            self.tabs.setCurrentWidget(current)
+        else:
+            self.tabs.setCurrentWidget(widget)
+        return widget
+
+    def prefetch_tabs(self):
+        """Opens the nearest restored tab around the current one, within prefetchTabs of it,
+        and comes back for the next one when the window is idle again."""
+        distance = self.config.get("prefetchTabs", DEFAULT_CONFIG["prefetchTabs"])
+        current = self.tabs.currentIndex()
+        for offset in range(1, distance + 1):
+            for index in (current + offset, current - offset):
+                placeholder = self.tabs.widget(index)
+                if isinstance(placeholder, TabPlaceholder) and placeholder.error is None:
+                    self.materialize_tab(placeholder)
+                    self.prefetch_timer.start()
+                    return
+
+    def restore_tab_state(self, editor, encoding, is_modified, caret_position, lexer, first_line=None):
+        """Puts back what the session recorded about a tab once its file has loaded."""
+        if encoding:
+            self.file_encodings[editor] = encoding
+        if is_modified:
+            mark_modified(editor)
+
+        self.set_language(lexer or "None", editor)
+        history = self.file_history.get(self.get_tab_file_path(editor)) or {}
+        self.restore_folds(editor, history.get("folds"))
+        if first_line is None:
+            # a tab from the last session, whose view was recorded when the application quit,
+            # after its session entry; hibernated tabs bring their own
+            caret_position = history.get("caret_position", caret_position)
+            first_line = history.get("first_visible_line")
+        if caret_position:
+            editor.setCursorPosition(*caret_position)
+        if first_line is not None:
+            editor.setFirstVisibleLine(first_line)
+        # opening the tab recorded it as a fresh one
+        self.config.add_open_file(
+            self.get_tab_file_path(editor), is_modified=is_modified,
+            caret_position=caret_position, lexer=lexer or "None"
+        )
 
     def add_new_tab(self, content="", title="new 1", file_name=""):
         """Add a new tab to the editor."""
         if not file_name:
             file_name = os.path.join(self.backup_path, f"{title}.bak")
+        if self.is_temp_backup(file_name):
+            number = untitled_number(title)
+            if number is not None:
+                self.untitled_numbers.take(number)
 
         editor = self.create_editor(content, file_name)
         editor.blockSignals(True)
@@ -427,9 +855,6 @@ class NotepadPy(QMainWindow):
         if file_name:
             self.set_tab_file_path(editor, file_name)
 
-        if title not in self.backup_files:
-            self.backup_files[title] = file_name
-
         self.config.add_open_file(file_path=file_name, is_modified=editor.isModified(), caret_position=editor.getCursorPosition(), lexer="None")
         self.config.save()
 
@@ -450,10 +875,7 @@ class NotepadPy(QMainWindow):
                 event.acceptProposedAction()
 
         def dropEvent(event):
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if file_path:
-                    self.open_file_by_path(file_path)
+            self.open_files([url.toLocalFile() for url in event.mimeData().urls()])
 
         editor.dragEnterEvent = dragEnterEvent
         editor.dropEvent = dropEvent
@@ -512,6 +934,17 @@ class NotepadPy(QMainWindow):
             editor.setWrapMode(QsciScintilla.WrapMode.WrapNone)
 
         editor.textChanged.connect(self.text_changed)
+
+        # bumped on every insert and delete, so backups are only written for documents that changed
+        editor.modification_generation = 0
+        editor.backup_generation = None
+
+        def count_modification(position, modification_type, text, length, *args):
+            if modification_type & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+                editor.modification_generation += 1
+                self.journal_edit(editor, position, modification_type, length)
+
+        editor.SCN_MODIFIED.connect(count_modification)
         
         return editor
 
@@ -535,30 +968,7 @@ class NotepadPy(QMainWindow):
     # new file
     def new_file(self):
         """Creates a new tab with the next available number."""
-        pattern = re.compile(r"^new (\d+)", re.IGNORECASE)
-
-        for i in range(self.tabs.count()):
-            title = self.tabs.tabText(i).replace("&", "")
-            match = pattern.match(title)
-            if match:
-                used_numbers.add(int(match.group(1)))
-
-        for file_name in os.listdir(self.backup_path):
-            match = pattern.match(file_name)
-            if match:
-                used_numbers.add(int(match.group(1)))
-
-        for file_info in self.config.get("open_files", []):
-            base = os.path.basename(file_info["file_path"])
-            match = pattern.match(base)
-            if match:
-                used_numbers.add(int(match.group(1)))
-
-        new_number = 1
-        while new_number in used_numbers:
-            new_number += 1
-
-        new_tab_title = f"new {new_number}"
+        new_tab_title = f"new {self.untitled_numbers.allocate()}"
         file_path = os.path.join(self.backup_path, f"{new_tab_title}.bak")
 
         self.plugin_api.log(f"Creating new tab: {new_tab_title}")
@@ -577,112 +987,498 @@ class NotepadPy(QMainWindow):
                 return 
     
         try:
-            with open(file_path, "rb") as file:
-                binary_content = file.read()
-                detected = from_bytes(binary_content).best()
-            
-                if detected:
-                    encoding = detected.encoding
-                    try: 
-                        content = binary_content.decode(encoding)
-                    except UnicodeDecodeError:
-                        content = binary_content.hex()
-                else:    
-                    content = binary_content.hex()
-        
-            editor = self.add_new_tab(content, os.path.basename(file_path), file_name=file_path)
+            override = self.get_file_encoding_override(file_path)
+            encoding = override or self.encoding_detector.detect(file_path)
+            self.open_detected_file(file_path, encoding, errors="replace" if override else "strict")
+
+        except Exception as e:
+            self.plugin_api.show_error("Error", f"Failed to open file '{file_path}':\n{str(e)}")
+
+    def open_detected_file(self, file_path, encoding, text=None, errors="strict"):
+        """Opens a file whose encoding is known in the kind of tab it needs. text is the file
+        already decoded to UTF-8, if it has been read; otherwise it's loaded in the background."""
+        if encoding is None:
+            self.open_hex_file(file_path)
+            return
+        if text is None and self.is_large_file(file_path):
+            self.open_large_file(file_path, encoding)
+            return
+
+        editor = self.add_new_tab("", os.path.basename(file_path), file_name=file_path)
+
+        # opened before, so it comes back the way it was left
+        history = self.file_history.get(file_path) or {}
+        lexer_name = history.get("lexer") or get_language_for_file(file_path) or "None"
+
+        self.config.add_open_file(file_path, is_modified=False, lexer=lexer_name)
+        self.config.save()
+
+        def loaded():
+            self.set_language(lexer_name, editor)
+            if history:
+                self.restore_folds(editor, history.get("folds"))
+                editor.setCursorPosition(*history.get("caret_position", (0, 0)))
+                editor.setFirstVisibleLine(history.get("first_visible_line", 0))
+            self.plugin_api.log(f"Opened: {file_path} with lexer: {lexer_name}")
+
+        if text is None:
+            self.load_file(editor, file_path, encoding, loaded, errors)
+            return
 
+        load_text(editor, text)
+        self.file_encodings[editor] = encoding
+        editor._margin_timer.timeout.emit()
+        loaded()
+
+    def open_files(self, file_paths):
+        """Opens several files at once. They're detected and read on the file thread pool,
+        and each gets its tab as soon as it's ready. Files that fail are reported together
+        once all are done."""
+        file_paths = list(dict.fromkeys(path for path in file_paths if path))
+        if len(file_paths) == 1:
+            self.open_file_by_path(file_paths[0])
+            return
+
+        batch = FileBatch(self.file_pool, parent=self)
+        open_paths = set(self.file_paths.values())
+        overrides = set()
+        read_limit = FileLoader.CHUNK_SIZE * 4
+
+        def opened(file_path, result):
+            if file_path in self.file_paths.values():
+                raise FileExistsError("The file is already open")
+            encoding, text = result
+            self.open_detected_file(file_path, encoding, text, errors="replace" if file_path in overrides else "strict")
+
+        for file_path in file_paths:
+            if file_path in open_paths:
+                batch.add()
+                batch.complete(file_path, "The file is already open")
+                continue
+            override = self.get_file_encoding_override(file_path)
+            if override:
+                overrides.add(file_path)
+            work = functools.partial(read_file, encoding_detector=self.encoding_detector, override=override, read_limit=read_limit)
+            batch.run(file_path, work, opened)
+
+        self.track_batch(batch, "Opening", "open")
+
+    def track_batch(self, batch, action, verb, on_finished=None):
+        """Shows the progress of a FileBatch with the others running, and one report of the
+        files that failed once it's done. on_finished runs before the report and may take
+        errors it deals with itself out of batch.errors."""
+        self.file_batches.add(batch)
+
+        def finished():
+            self.file_batches.discard(batch)
+            if on_finished:
+                on_finished()
+            self.update_batch_progress()
+            self.statusBar().showMessage(f"{action} {batch.total} files done", 3000)
+            self.plugin_api.log(f"{action} {batch.total} files done, {len(batch.errors)} failed")
+            if batch.errors:
+                self.plugin_api.show_error(
+                    "Error", f"Failed to {verb} {len(batch.errors)} of {batch.total} files:\n\n{batch.error_report()}"
+                )
+            batch.deleteLater()
+
+        def progress(completed, total):
+            self.update_batch_progress()
+            self.statusBar().showMessage(f"{action} files... {completed} of {total}")
+
+        batch.progress.connect(progress)
+        batch.finished.connect(finished)
+        self.update_batch_progress()
+        batch.close()
+
+    def update_batch_progress(self):
+        total = sum(batch.total for batch in self.file_batches)
+        if not total:
+            self.batch_progress.hide()
+            return
+        self.batch_progress.setRange(0, total)
+        self.batch_progress.setValue(sum(batch.completed for batch in self.file_batches))
+        self.batch_progress.show()
+
+    def is_large_file(self, file_path):
+        threshold = self.config.get("largeFileThreshold", DEFAULT_CONFIG["largeFileThreshold"])
+        return os.path.getsize(file_path) > threshold
+
+    def open_large_file(self, file_path, encoding):
+        """Opens a file too big to load in a read-only tab that only holds a window of it."""
+        editor = self.add_new_tab("", os.path.basename(file_path), file_name=file_path)
+        # the viewer numbers the lines itself, with their numbers in the file
+        editor._margin_timer.timeout.disconnect()
+
+        viewer = LargeFileView(editor, file_path, encoding, parent=self)
+        self.large_files[editor] = viewer
+        self.file_encodings[editor] = viewer.encoding
+
+        def show_progress(percent):
+            if self.tabs.currentWidget() is editor:
+                self.statusBar().showMessage(f"Indexing lines of {os.path.basename(file_path)}... {percent}%")
+
+        def indexed():
+            if self.tabs.currentWidget() is editor:
+                self.statusBar().showMessage(f"{viewer.index.line_count()} lines, opened read-only", 5000)
+
+        viewer.index.progress.connect(show_progress)
+        viewer.index.finished.connect(indexed)
+        editor.blockSignals(True)
+        viewer.open()
+        editor.blockSignals(False)
+
+        self.config.add_open_file(file_path, is_modified=False, lexer="None")
+        self.config.save()
+        self.plugin_api.log(f"Opened {file_path} ({os.path.getsize(file_path)} bytes) in the large file viewer as {viewer.encoding}")
+        return viewer
+
+    def open_hex_file(self, file_path):
+        """Opens a binary file in a hex view tab."""
+        view = HexView(file_path)
+        scintilla_config = self.config.get("scintillaConfig", {})
+        font = QFont(scintilla_config.get("font", "Courier New"), scintilla_config.get("font_size", 12))
+        font.setFixedPitch(True)
+        view.setFont(font)
+        view.set_colors(
+            QColor(scintilla_config.get("color", "#FFFFFF")),
+            QColor(scintilla_config.get("font_color", "#000000")),
+            QColor(scintilla_config.get("margins_color", "#e0e0e0"))
+        )
+
+        def show_offset(offset):
+            if self.tabs.currentWidget() is view:
+                self.statusBar().showMessage(f"Offset 0x{offset:X} ({offset}) of {view.size} bytes")
+
+        view.cursor_moved.connect(show_offset)
+
+        index = self.tabs.addTab(view, os.path.basename(file_path))
+        self.tabs.setTabIcon(index, QIcon("icons/text.png"))
+        self.tabs.setCurrentIndex(index)
+        self.set_tab_file_path(view, file_path)
+
+        self.config.add_open_file(file_path, is_modified=False, lexer="None")
+        self.config.save()
+        self.update_title()
+        self.plugin_api.log(f"Opened {file_path} in the hex view")
+        return view
+
+    def replace_tab(self, widget, open_file):
+        """Opens a tab's file again through open_file(file_path), moves the new tab into its
+        place and closes it."""
+        index, count = self.tabs.indexOf(widget), self.tabs.count()
+        # without a path the closing tab leaves the file's session entry and backups alone
+        file_path = self.file_paths.pop(widget)
+        open_file(file_path)
+        if self.tabs.count() == count:
+            self.set_tab_file_path(widget, file_path)
+            return
+
+        self.tabs.tabBar().moveTab(count, index)
+        if isinstance(widget, QsciScintilla):
+            widget.setModified(False)
+        self.close_tab(self.tabs.indexOf(widget))
+
+    def load_file(self, editor, file_path, encoding, on_loaded=None, errors="strict"):
+        """Loads a file into an editor a chunk at a time while the event loop is idle, showing
+        progress on the tab. on_loaded runs once the whole file is in. Closing the tab
+        cancels the load."""
+        self.cancel_file_load(editor)
+
+        # the detector gets another go at files that don't decode, unless the user picked the encoding
+        detector = self.encoding_detector if errors == "strict" else None
+        loader = FileLoader(editor, file_path, encoding, detector, errors, executor=self.file_pool, parent=self)
+        self.file_loaders[editor] = loader
+        title = self.tabs.tabText(self.tabs.indexOf(editor))
+
+        def show_progress(percent):
+            index = self.tabs.indexOf(editor)
+            if index != -1 and percent < 100:
+                self.tabs.setTabText(index, f"{title} [{percent}%]")
+                if self.tabs.currentWidget() is editor:
+                    self.statusBar().showMessage(f"Loading {title}... {percent}% (close the tab to cancel)")
+
+        def done():
+            if self.file_loaders.get(editor) is loader:
+                del self.file_loaders[editor]
+            loader.deleteLater()
+            index = self.tabs.indexOf(editor)
+            if index != -1:
+                self.tabs.setTabText(index, title)
+            self.statusBar().clearMessage()
+
+        def finish():
+            done()
+            self.file_encodings[editor] = loader.encoding
             if hasattr(editor, '_margin_timer'):
                 editor._margin_timer.timeout.emit()
-        
-            lexer_class = get_lexer_for_file(file_path)
-            lexer_name = "None"
-        
-            if lexer_class:
-                for language, cls in DEFAULT_LANGUAGES.items():
-                    if cls == lexer_class:
-                        lexer_name = language
-                        break
-        
-            self.set_language(lexer_name)
-        
-            self.config.add_open_file(file_path, is_modified=False, lexer=lexer_name)
-            self.config.save()
-        
-            editor.setModified(False)
-        
-            self.plugin_api.log(f"Opened: {file_path} with lexer: {lexer_name}")
+            if on_loaded:
+                on_loaded()
+
+        def fail(message):
+            done()
+            self.plugin_api.show_error("Error", f"Failed to open file '{file_path}':\n{message}")
+            index = self.tabs.indexOf(editor)
+            if index != -1:
+                self.close_tab(index)
+
+        def binary():
+            done()
+            if self.tabs.indexOf(editor) != -1:
+                self.plugin_api.log(f"{file_path} turned out to be binary; showing it in the hex view")
+                self.replace_tab(editor, self.open_hex_file)
+
+        loader.progress.connect(show_progress)
+        loader.finished.connect(finish)
+        loader.failed.connect(fail)
+        loader.binary.connect(binary)
+        loader.start()
+        return loader
+
+    def cancel_file_load(self, editor):
+        loader = self.file_loaders.pop(editor, None)
+        if loader is not None:
+            loader.cancel()
+            loader.deleteLater()
+
+    def is_loading(self, editor):
+        """Whether a file is still being loaded into the editor, or only a window of it is shown.
+        Until it's all in, the document only holds part of the file and must not be saved over it."""
+        if editor in self.file_loaders:
+            self.plugin_api.show_error("Error", "The file is still loading.")
+            return True
+        if editor in self.large_files:
+            self.plugin_api.show_error("Error", "Large files are opened read-only.")
+            return True
+        return False
+
+    def get_file_encoding_override(self, file_path):
+        return self.config.get("encoding_overrides", {}).get(file_path)
+
+    def set_file_encoding_override(self, file_path, encoding):
+        overrides = dict(self.config.get("encoding_overrides", {}))
+        if encoding:
+            overrides[file_path] = encoding
+        else:
+            overrides.pop(file_path, None)
+        self.config.set("encoding_overrides", overrides)
+        self.config.save()
 
-        except Exception as e:
-            self.plugin_api.show_error("Error", f"Failed to open file '{file_path}':\n{str(e)}")
+    def set_file_encoding(self, editor, encoding):
+        """Overrides the encoding of the file open in a tab and reloads it in that encoding.
+        An encoding of None goes back to detecting it."""
+        file_path = self.get_tab_file_path(editor)
+        if not file_path or file_path.startswith(self.backup_path) or not os.path.exists(file_path):
+            self.plugin_api.show_error("Error", "Only files that are saved on disk can be reopened in another encoding.")
+            return False
+
+        if encoding:
+            try:
+                encoding = codecs.lookup(encoding).name
+            except LookupError:
+                self.plugin_api.show_error("Error", f"Unknown encoding: {encoding}")
+                return False
+
+        if isinstance(editor, QsciScintilla) and editor.isModified():
+            reply = QMessageBox.question(
+                self,
+                "Reopen",
+                "Reopening the file in another encoding discards your changes. Continue?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return False
+
+        self.set_file_encoding_override(file_path, encoding)
+        overrides = self.config.get("encoding_overrides", {})
+
+        if not encoding:
+            encoding = self.encoding_detector.detect(file_path)
+
+        if isinstance(editor, HexView) or encoding is None:
+            # opened again in the same place, as text or in the hex view if it's binary
+            self.replace_tab(editor, self.open_file_by_path)
+            return True
+
+        viewer = self.large_files.get(editor)
+        if viewer is not None:
+            editor.blockSignals(True)
+            viewer.set_encoding(encoding)
+            editor.blockSignals(False)
+            self.file_encodings[editor] = viewer.encoding
+            self.plugin_api.log(f"Reopened {file_path} as {viewer.encoding}")
+            return True
+
+        def loaded():
+            self.plugin_api.log(f"Reopened {file_path} as {self.file_encodings.get(editor) or 'hex'}")
+            # styles and line states were for the old text
+            self.set_language(self.tab_settings.get(editor, {}).get("language", "None"), editor)
+
+        self.cancel_background_styling(editor)
+        editor.setLexer(None)
+        self.load_file(editor, file_path, encoding, loaded, errors="replace" if file_path in overrides else "strict")
+        return True
+
+    def reopen_with_encoding(self):
+        """Asks for an encoding and reopens the current file in it."""
+        editor = self.tabs.currentWidget()
+        if not isinstance(editor, (QsciScintilla, HexView)):
+            return
+
+        detect = "Detect automatically"
+        encodings = [detect, "utf_8", "utf_8_sig", "utf_16", "utf_32", "ascii", "latin_1", "cp1252", "cp1251", "cp437", "shift_jis", "euc_jp", "gb18030", "big5", "euc_kr", "koi8_r"]
+        current = self.get_file_encoding_override(self.get_tab_file_path(editor)) or detect
+        if current not in encodings:
+            encodings.append(current)
+
+        encoding, ok = QInputDialog.getItem(
+            self, "Reopen with Encoding", "Encoding (or type any Python codec name):",
+            encodings, encodings.index(current), True
+        )
+        if ok and encoding:
+            self.set_file_encoding(editor, None if encoding == detect else encoding)
 
     # open file dialog
     def open_file_dialog(self):
         """Opens the file dialog."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "All types (*)")
-        if file_path:
-            self.open_file_by_path(file_path)
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Open File", "", "All types (*)")
+        self.open_files(file_paths)
 
     # open file (dropped)
     def open_dropped_file(self, file_path):
         """Handles a file dropped into Notepad8."""
         self.open_file_by_path(file_path)
                 
-    def save_file(self, editor):
-        """Saves the current file."""
+    def save_file(self, editor, on_saved=None):
+        """Saves the current file. on_saved runs once it's safely on disk."""
+        if self.is_loading(editor):
+            return
         file_path = self.get_tab_file_path(editor)
 
         # TODO: this is ok for "new" files, but backed up files should save over the original
         if not file_path or file_path.startswith(self.backup_path):
-            self.save_file_as(editor)
+            self.save_file_as(editor, on_saved)
             return
 
-        try:
-            with open(file_path, "w", encoding="utf-8") as file:
-                file.write(editor.text())
+        self.write_file(editor, file_path, functools.partial(self.file_saved, file_path, on_saved))
 
-            backup_file = self.backup_files.pop(file_path, None)
-            if backup_file and os.path.exists(backup_file):
-                os.remove(backup_file)
+    def file_saved(self, file_path, on_saved=None):
+        if self.backup_store.remove(file_path):
+            self.commit_backups()
+        for editor, journal in self.journals.items():
+            if self.get_tab_file_path(editor) == file_path:
+                self.journal_writer.remove(journal.path)
+                journal.reset()
 
-            editor.setModified(False)
-            self.plugin_api.log(f"File saved: {file_path}")
+        self.plugin_api.log(f"File saved: {file_path}")
+        if on_saved:
+            on_saved()
 
-        except Exception as e:
-            self.plugin_api.show_error("Error", f"Failed to save file '{file_path}': {e}")
-
-            
-    def save_file_as(self, editor):
+    def save_file_as(self, editor, on_saved=None):
+        if self.is_loading(editor):
+            return
         file_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "All Files (*)")
-        if file_path:
-            try:
-                with open(file_path, "w", encoding="utf-8", newline='') as file:
-                    file.write(editor.text())
-                    editor.setModified(False)
-                self.set_tab_file_path(editor, file_path)
-                self.modified_tabs[editor] = False
+        if not file_path:
+            return
 
-                self.config.add_open_file(file_path, is_modified=False, lexer=self.get_lexer_for_editor(editor))
-                self.config.save()
+        old_path = self.get_tab_file_path(editor)
+
+        def saved():
+            self.set_tab_file_path(editor, file_path)
+            self.modified_tabs[editor] = False
+
+            if old_path and self.is_temp_backup(old_path):
+                # no longer a new tab, so its number and backup are free
+                self.config.remove_open_file(old_path)
+                self.forget_untitled(old_path)
+                self.drop_journal(editor)
+                if self.backup_store.remove(old_path):
+                    self.commit_backups()
+
+            self.config.add_open_file(file_path, is_modified=False, lexer=self.get_lexer_for_editor(editor))
+            self.config.save()
+
+            self.update_tab_title(editor, file_path)
+            self.update_title()
+            if on_saved:
+                on_saved()
 
-                self.update_tab_title(editor, file_path)
-                self.update_title()
-            except Exception as e:
-                self.plugin_api.show_error("Error", f"Failed to save file!:\n{str(e)}")
+        self.write_file(editor, file_path, saved)
             
     def save_file_as_copy(self, editor):
+        if self.is_loading(editor):
+            return
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Copy As", "", "All Files (*)")
         if not file_path:
             return
 
-        try:
-            with open(file_path, "w", encoding="utf-8", newline='') as file:
-                file.write(editor.text())
+        self.write_file(
+            editor, file_path,
+            lambda: self.plugin_api.log(f"Saved copy of current file to: {file_path}"),
+            update_tab=False
+        )
 
-            self.plugin_api.log(f"Saved copy of current file to: {file_path}")
+    def write_file(self, editor, file_path, on_saved=None, update_tab=True, encoding=None, batch=None):
+        """Writes the editor's text to a file on a worker thread, in the encoding the tab's file
+        was read in. on_saved runs, and with update_tab the tab is marked as saved, only once
+        the file is safely on disk. As part of a FileBatch, the save runs on the file thread
+        pool and errors are left for the batch to report."""
+        name = os.path.basename(file_path)
+        if editor in self.file_savers:
+            self.statusBar().showMessage(f"Still saving {name}...", 3000)
+            return
 
-        except Exception as e:
-            self.plugin_api.show_error("Error", f"Failed to save file copy:\n{file_path}", e)
+        encoding = encoding or self.file_encodings.get(editor) or "utf_8"
+        saver = FileSaver(editor, file_path, encoding, parent=self)
+        self.file_savers[editor] = saver
+        if batch is None:
+            self.statusBar().showMessage(f"Saving {name}...")
+        else:
+            batch.add()
+
+        def finish():
+            self.file_savers.pop(editor, None)
+            saver.deleteLater()
+            if self.tabs.indexOf(editor) != -1:
+                if update_tab:
+                    if self.file_encodings.get(editor) != saver.encoding:
+                        # saved in another encoding than it was read in, which now no longer applies
+                        self.file_encodings[editor] = saver.encoding
+                        self.set_file_encoding_override(file_path, None)
+                    # edits made while saving keep the tab modified
+                    if saver.is_current():
+                        editor.setModified(False)
+                if on_saved:
+                    on_saved()
+
+            if batch is None:
+                self.statusBar().showMessage(f"Saved {name}", 3000)
+            else:
+                batch.complete(file_path)
+
+        def fail(error):
+            self.file_savers.pop(editor, None)
+            saver.deleteLater()
+            if batch is not None:
+                batch.complete(file_path, error)
+                return
+            self.statusBar().clearMessage()
+            if isinstance(error, UnicodeEncodeError) and self.tabs.indexOf(editor) != -1:
+                reply = QMessageBox.question(
+                    self,
+                    "Save",
+                    f"{name} contains {error.object[error.start:error.end]!r}, which can't be saved in {encoding}. Save it as UTF-8 instead?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                )
+                if reply == QMessageBox.StandardButton.Yes:
+                    self.write_file(editor, file_path, on_saved, update_tab, "utf_8")
+                return
+            self.plugin_api.show_error("Error", f"Failed to save file '{file_path}'", error)
+
+        saver.finished.connect(finish)
+        saver.failed.connect(fail)
+        saver.start(None if batch is None else self.file_pool)
+        return saver
                 
     def save_current_file(self):
         editor = self.tabs.currentWidget()
@@ -700,19 +1496,70 @@ class NotepadPy(QMainWindow):
             self.save_file_as_copy(editor)
 
     def save_all_files(self):
-        saved_count = 0
-    
         for i in range(self.tabs.count()):
-            editor = self.tabs.widget(i)
-            if isinstance(editor, QsciScintilla) and editor.isModified():
-                self.save_file(editor)
-                saved_count += 1
-    
-        if saved_count > 0:
-            self.plugin_api.log(f"Saved {saved_count} file(s)")
+            placeholder = self.tabs.widget(i)
+            if isinstance(placeholder, TabPlaceholder) and placeholder.is_modified and placeholder.error is None:
+                # restored with changes that are only in its backup so far
+                self.materialize_tab(placeholder)
+
+        editors = [
+            self.tabs.widget(i) for i in range(self.tabs.count())
+            if isinstance(self.tabs.widget(i), QsciScintilla) and self.tabs.widget(i).isModified()
+        ]
+        # new files ask where to go one at a time, the rest are saved together
+        untitled = [
+            editor for editor in editors
+            if not self.get_tab_file_path(editor) or self.get_tab_file_path(editor).startswith(self.backup_path)
+        ]
+        self.save_files([editor for editor in editors if editor not in untitled])
+        for editor in untitled:
+            self.save_file(editor)
+
+        if editors:
+            self.plugin_api.log(f"Saving {len(editors)} file(s)")
         else:
             self.plugin_api.log("No modified files to save")
 
+    def save_files(self, editors, encoding=None):
+        """Saves several tabs to their files at once on the file thread pool, with one
+        progress bar and one report of the files that failed. Files with text their encoding
+        can't hold are offered to be saved as UTF-8 together."""
+        editors = [
+            editor for editor in editors
+            if editor not in self.file_loaders and editor not in self.large_files and editor not in self.file_savers
+        ]
+        if not editors:
+            return
+
+        batch = FileBatch(self.file_pool, parent=self)
+        for editor in editors:
+            file_path = self.get_tab_file_path(editor)
+            self.write_file(editor, file_path, functools.partial(self.file_saved, file_path), encoding=encoding, batch=batch)
+
+        def finished():
+            unencodable = [
+                (file_path, error) for file_path, error in batch.errors
+                if isinstance(error, UnicodeEncodeError)
+            ]
+            if not unencodable:
+                return
+            batch.errors = [item for item in batch.errors if item not in unencodable]
+
+            editors_by_path = {path: editor for editor, path in self.file_paths.items()}
+            retry = [editors_by_path[file_path] for file_path, _ in unencodable if file_path in editors_by_path]
+            names = "\n".join(os.path.basename(file_path) for file_path, _ in unencodable[:20])
+            reply = QMessageBox.question(
+                self,
+                "Save",
+                f"{len(unencodable)} file(s) contain text that can't be saved in their encoding:\n\n{names}\n\nSave them as UTF-8 instead?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                # after this batch's report, which may still be on screen
+                QTimer.singleShot(0, functools.partial(self.save_files, retry, "utf_8"))
+
+        self.track_batch(batch, "Saving", "save", finished)
+
     # drag event
     def dragEnterEvent(self, event):
         """Handles the drag enter event."""
@@ -722,42 +1569,12 @@ class NotepadPy(QMainWindow):
     # drop event
     def dropEvent(self, event):
         """Handles the drop event."""
-        for url in event.mimeData().urls():
-            file_path = url.toLocalFile()
-            if file_path:
-                self.open_dropped_file(file_path)
+        self.open_files([url.toLocalFile() for url in event.mimeData().urls()])
 
     def load_lexer_colors(self, lexer_name):
         """Load lexer colors from a JSON file or _lang.json config."""
-        from file_types import GENERIC_LEXERS
-        for lang_name, lexer_info in GENERIC_LEXERS.items():
-            if lexer_name == f"{lang_name}Lexer" or lexer_name == lang_name:
-                if "styles" in lexer_info["config"]:
-                    return lexer_info["config"]["styles"]
-                elif "colors" in lexer_info["config"]:
-                    colors = lexer_info["config"]["colors"]
-                    return {k: {"color": v} for k, v in colors.items()}
-    
-        lexer_name = lexer_name.replace("Lexer", "")
-        if lexer_name.startswith("custom_lexers"):
-            lexer_name = lexer_name.split(".")[-1]
-
-        lexer_dir = os.path.join(os.path.dirname(__file__), "lexer")
-        lexer_file = os.path.join(lexer_dir, f"{lexer_name}.json")
-
-        if not os.path.exists(lexer_file):
-            return {}
-
-        try:
-            with open(lexer_file, "r") as file:
-                data = json.load(file)
-                if isinstance(data, dict) and any(isinstance(v, dict) for v in data.values()):
-                    return data
-                else:
-                    return {k: {"color": v} for k, v in data.items()}
-        except json.JSONDecodeError as e:
-            self.plugin_api.log(f"error parsing JSON file for {lexer_file}! {e}")
-            return {}
+        from file_types import LEXER_REGISTRY
+        return LEXER_REGISTRY.get_styles(lexer_name)
 
     def get_lexer_for_editor(self, editor):
         """Retrieve the current lexer for the given editor."""
@@ -817,15 +1634,24 @@ class NotepadPy(QMainWindow):
         lexer.setPaper(default_background, default_style)
         lexer.setColor(default_font_color, default_style)
         lexer.setFont(font, default_style)
+
+        background = self.config.get("backgroundStyling", True)
+        if background and hasattr(lexer, 'styling_horizon'):
+            # setLexer styles the whole document; only let it style what's on screen
+            lexer.styling_horizon = BackgroundStyler.viewport_end(editor)
     
         editor.setLexer(lexer)
     
         editor.setMarginsBackgroundColor(QColor(scintilla_config.get("margins_color", "#c0c0c0")))
         editor.setMarginsForegroundColor(default_font_color)
 
+        if background:
+            # Style the rest of the document while the event loop is idle
+            self.style_in_background(editor, lexer)
+            editor._lexer_applied = lexer_name
         # Only do the expensive re-style if the document isn't already styled
         # Check if document already has styling applied
-        if not hasattr(editor, '_lexer_applied') or editor._lexer_applied != lexer_name:
+        elif not hasattr(editor, '_lexer_applied') or editor._lexer_applied != lexer_name:
             # Force complete re-styling of the entire document
             editor.SendScintilla(QsciScintilla.SCI_SETLEXER, editor.SendScintilla(QsciScintilla.SCI_GETLEXER))
             editor.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, -1)
@@ -842,16 +1668,51 @@ class NotepadPy(QMainWindow):
 
         return font
 
-    def set_language(self, language):
-        """Set the syntax highlighting language for the current editor."""
-        for lang, action in self.language_actions.items():
-            action.setChecked(lang == language)
+    def style_in_background(self, editor, lexer):
+        """Finish styling the editor's document in idle time slices, reporting progress in the status bar."""
+        self.cancel_background_styling(editor)
+
+        styler = BackgroundStyler(editor, lexer, parent=self)
+        self.background_stylers[editor] = styler
+
+        def show_progress(percent):
+            if self.tabs.currentWidget() is editor and percent < 100:
+                self.statusBar().showMessage(f"Styling {self.tabs.tabText(self.tabs.indexOf(editor))}... {percent}%")
+
+        def finish():
+            if self.background_stylers.get(editor) is styler:
+                del self.background_stylers[editor]
+            self.statusBar().clearMessage()
+
+        styler.progress.connect(show_progress)
+        styler.finished.connect(finish)
+        styler.start()
+
+    def cancel_background_styling(self, editor):
+        styler = self.background_stylers.pop(editor, None)
+        if styler:
+            styler.cancel()
+            styler.deleteLater()
+            self.statusBar().clearMessage()
+
+    def set_language(self, language, editor=None):
+        """Set the syntax highlighting language for an editor (the current one by default)."""
+        current_editor = self.tabs.currentWidget()
+        editor = editor or current_editor
+
+        if editor is current_editor:
+            for lang, action in self.language_actions.items():
+                action.setChecked(lang == language)
     
-        self.current_language = language
+            self.current_language = language
     
-        editor = self.tabs.currentWidget()
         if not isinstance(editor, QsciScintilla):
             return
+        if editor in self.large_files:
+            # lexers would restyle the whole window every time it slides
+            return
+
+        self.cancel_background_styling(editor)
     
         if language == "None":
             editor.setLexer(None)
@@ -874,10 +1735,25 @@ class NotepadPy(QMainWindow):
         self.plugin_api.log(f"Set language to {language}")
 
     def close_tab(self, index):
+        """Closes a tab, asking to save it first if it's modified. Returns False if the user
+        cancelled, so close_all_tabs can stop there."""
         editor = self.tabs.widget(index)
+        if editor is None:
+            return True
+        if editor in self.file_savers:
+            # a tab saved on closing goes once the save is done
+            self.statusBar().showMessage(f"Still saving {self.tabs.tabText(index)}...", 3000)
+            return True
+        if isinstance(editor, TabPlaceholder) and editor.is_modified and editor.error is None and editor in self.file_paths:
+            # its changes are only in the backup, so open it to be able to save them
+            editor = self.materialize_tab(editor)
+            if editor is None:
+                return False
+            index = self.tabs.indexOf(editor)
         file_path = self.get_tab_file_path(editor)
+        self.remember_view_state(editor)
 
-        if editor.isModified():
+        if isinstance(editor, QsciScintilla) and editor.isModified():
             reply = QMessageBox.question(
                 self, 
                 "Save", 
@@ -886,13 +1762,35 @@ class NotepadPy(QMainWindow):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                self.save_file(editor)
+                if self.is_loading(editor):
+                    return False
+                # the tab and its backup stay until the file is on disk, so a failed save loses nothing
+                self.save_file(editor, functools.partial(self.close_saved_tab, editor))
+                return True
             elif reply == QMessageBox.StandardButton.No:
                 pass
             else:
-                return
+                return False
 
-        self.tabs.removeTab(index)
+        self.remove_tab(editor, file_path)
+        return True
+
+    def close_saved_tab(self, editor):
+        """Finishes closing a tab once it has been saved, unless it was edited while saving."""
+        if self.tabs.indexOf(editor) == -1 or editor.isModified():
+            return
+        self.remove_tab(editor, self.get_tab_file_path(editor))
+
+    def remove_tab(self, editor, file_path):
+        """Removes a tab along with its session entry and backup."""
+        self.tabs.removeTab(self.tabs.indexOf(editor))
+        self.cancel_file_load(editor)
+        viewer = self.large_files.pop(editor, None)
+        if viewer is not None:
+            viewer.close()
+        if isinstance(editor, HexView):
+            editor.close_file()
+        self.cancel_background_styling(editor)
 
         if editor in self.modified_tabs:
             del self.modified_tabs[editor]
@@ -900,32 +1798,22 @@ class NotepadPy(QMainWindow):
             del self.file_paths[editor]
         if editor in self.tab_settings:
             del self.tab_settings[editor]
+        if editor in self.file_encodings:
+            del self.file_encodings[editor]
+        self.tab_activity.pop(editor, None)
+        self.drop_journal(editor)
     
         if file_path:
             self.config.remove_open_file(file_path)
             self.config.save()
 
-            is_backup = file_path.startswith(self.backup_path) and file_path.endswith('.bak')
-        
-            if is_backup and os.path.exists(file_path):
+            self.forget_untitled(file_path)
+            if self.backup_store.remove(file_path):
                 try:
-                    os.remove(file_path)
-                    self.plugin_api.log(f"Deleted backup file: {file_path}")
+                    self.commit_backups()
+                    self.plugin_api.log(f"Deleted backup of: {file_path}")
                 except Exception as e:
-                    self.plugin_api.log(f"Failed to delete backup {file_path}: {e}")
-        
-            if not is_backup:
-                backup_name = f"{os.path.basename(file_path)}.bak"
-                backup_file = os.path.join(self.backup_path, backup_name)
-                if os.path.exists(backup_file):
-                    try:
-                        os.remove(backup_file)
-                        self.plugin_api.log(f"Deleted associated backup: {backup_file}")
-                    except Exception as e:
-                        self.plugin_api.log(f"Failed to delete backup {backup_file}: {e}")
-        
-            if file_path in self.backup_files:
-                del self.backup_files[file_path]
+                    self.plugin_api.log(f"Failed to delete backup of {file_path}: {e}")
     
         self.update_title()
     
@@ -943,37 +1831,58 @@ class NotepadPy(QMainWindow):
             
     def close_all_tabs(self):
         """Close all open tabs."""
-        while self.tabs.count() > 1:
-            self.close_tab(self.tabs.count() - 1)
-        
-        if self.tabs.count() > 0:
-            self.close_tab(0)
+        # each tab is asked about once; those saved on closing go when their save is done
+        for editor in reversed([self.tabs.widget(index) for index in range(self.tabs.count())]):
+            index = self.tabs.indexOf(editor)
+            if index != -1 and not self.close_tab(index):
+                break
+
+    def forget_untitled(self, file_path):
+        """Frees the number of a new tab that's gone, along with its backup."""
+        if self.is_temp_backup(file_path):
+            number = untitled_number(os.path.basename(file_path))
+            if number is not None:
+                self.untitled_numbers.release(number)
 
     def cleanup_orphaned_backups(self):
-        """Remove backup files that are no longer in the open_files config."""
-        if not os.path.exists(self.backup_path):
-            return
-    
-        open_file_paths = {f["file_path"] for f in self.config.get("open_files", [])}
+        """Remove backups of documents that are no longer in the open_files config."""
+        open_file_paths = {f["file_path"] for f in self.config.get_open_files()}
+
+        for key in self.backup_store:
+            if key not in open_file_paths:
+                self.backup_store.remove(key)
+                self.plugin_api.log(f"Cleaned up orphaned backup of: {key}")
+
+        try:
+            self.commit_backups()
+        except OSError as e:
+            self.plugin_api.log(f"Failed to cleanup backups: {e}")
+
+    def migrate_backups(self):
+        """Moves the backups from before the backup store, a <file name>.bak next to the
+        store for each document, into it."""
+        for file_info in self.config.get_open_files():
+            file_path = file_info["file_path"]
+            if self.is_temp_backup(file_path):
+                backup_file = file_path
+            else:
+                backup_file = os.path.join(self.backup_path, f"{os.path.basename(file_path)}.bak")
+
+            try:
+                with open(backup_file, "rb") as file:
+                    data = file.read()
+            except OSError:
+                continue
+            # along with the edits journaled since
+            data = replay(f"{backup_file}.journal", data) or data
+            self.backup_store.put(file_path, data)
+
+        for file_name in os.listdir(self.backup_path):
+            if file_name.endswith((".bak", ".journal")):
+                os.remove(os.path.join(self.backup_path, file_name))
+        self.backup_store.save_index()
+        self.plugin_api.log(f"Moved {len(self.backup_store.entries)} backup(s) into the backup store")
 
-        for backup_file in os.listdir(self.backup_path):
-            backup_path = os.path.join(self.backup_path, backup_file)
-        
-            if backup_path not in open_file_paths:
-                original_name = backup_file.replace('.bak', '')
-                is_referenced = any(
-                    os.path.basename(f) == original_name or 
-                    f"{os.path.basename(f)}.bak" == backup_file 
-                    for f in open_file_paths
-                )
-            
-                if not is_referenced:
-                    try:
-                        os.remove(backup_path)
-                        self.plugin_api.log(f"Cleaned up orphaned backup: {backup_path}")
-                    except Exception as e:
-                        self.plugin_api.log(f"Failed to cleanup {backup_path}: {e}")
-            
     def update_tab_title(self, editor, file_path):
         index = self.tabs.indexOf(editor)
         if index != -1:
@@ -1013,11 +1922,18 @@ class NotepadPy(QMainWindow):
     
     def goto_line(self):
         current_editor = self.tabs.currentWidget()
+        if isinstance(current_editor, HexView):
+            self.goto_offset(current_editor)
+            return
         if not isinstance(current_editor, QsciScintilla):
             QMessageBox.warning(self, "Error", "There is no active editor.")
             return
 
-        total_lines = current_editor.lines()
+        viewer = self.large_files.get(current_editor)
+        if viewer is not None:
+            total_lines = viewer.index.line_count()
+        else:
+            total_lines = current_editor.lines()
 
         line_number, ok = QInputDialog.getInt(
             self,
@@ -1029,13 +1945,34 @@ class NotepadPy(QMainWindow):
         )
 
         if ok and 1 <= line_number <= total_lines:
-            current_editor.setCursorPosition(line_number - 1, 0)
+            if viewer is not None:
+                viewer.goto_line(line_number - 1)
+            else:
+                current_editor.setCursorPosition(line_number - 1, 0)
+
+    def goto_offset(self, view):
+        # offsets can be past what getInt takes
+        text, ok = QInputDialog.getText(self, "Go To...", f"Enter an offset (0 - 0x{max(view.size - 1, 0):X}, 0x for hex):")
+        if not ok or not text.strip():
+            return
+        try:
+            offset = int(text.strip(), 0)
+        except ValueError:
+            self.plugin_api.show_error("Error", f"Not an offset: {text}")
+            return
+        view.goto_offset(offset)
 
     def update_title_on_tab_change(self, index):
         """Update window title and restore tab settings when switching tabs."""
         self.update_title()
 
         editor = self.tabs.widget(index)
+        if isinstance(editor, TabPlaceholder):
+            if editor.error is None:
+                self.materialize_tab(editor)
+            return
+        self.tab_activity[editor] = time.monotonic()
+        self.prefetch_timer.start()
         if not isinstance(editor, QsciScintilla):
             return
 
@@ -1085,7 +2022,10 @@ class NotepadPy(QMainWindow):
     def print_file(self):
         """Opens the print dialog box."""
         # TODO: i could not figure out how to print from Scintilla, so this will lack syntax highlighting for now
-        if not print_support:
+        try:
+            from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
+        except ImportError as e:
+            print(f"Failed to import QtPrintSupport. {e}\nPrinting functions will be unavailable.")
             self.plugin_api.show_error("Printing Unavailable", "QtPrintSupport failed to load. Printing is unavailable for this session. Refer to your distro's manual for further instructions.")
             return
 
@@ -1130,6 +2070,9 @@ class NotepadPy(QMainWindow):
     def find_dialog(self):
         """Opens the search dialog."""
         editor = self.tabs.currentWidget()
+        if isinstance(editor, HexView):
+            self.find_bytes_dialog(editor)
+            return
         if not isinstance(editor, QsciScintilla):
             return
 
@@ -1147,6 +2090,23 @@ class NotepadPy(QMainWindow):
             self.last_search_options = options
             self.find_text_in_editor(editor, options)
 
+    def find_bytes_dialog(self, view):
+        """Asks for a byte pattern and finds it in a hex view."""
+        text, ok = QInputDialog.getText(self, "Find Bytes", "Hex bytes (4D 5A 90) or \"text\":", text=self.last_byte_search)
+        if ok and text.strip():
+            self.last_byte_search = text
+            self.find_bytes(view, True)
+
+    def find_bytes(self, view, forward):
+        try:
+            pattern = parse_byte_pattern(self.last_byte_search)
+        except ValueError:
+            self.plugin_api.show_error("Error", f"Not hex bytes or quoted text: {self.last_byte_search}")
+            return
+        wrap_around = self.config.get("wrapAroundSearch", False)
+        if not view.find(pattern, forward, wrap_around):
+            QMessageBox.information(self, "Find", f"{self.last_byte_search} not found.")
+
     # Replace Dialog
     def replace_dialog(self):
         """Opens the replace dialog."""
@@ -1185,8 +2145,8 @@ class NotepadPy(QMainWindow):
         if not search_text:
             return 0
     
-        full_text = editor.text()
-        current_position = editor.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)
+        full_text = document_buffer.read_text(editor)
+        current_position = document_buffer.character_offset(editor, editor.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS))
         count = 0
     
         flags = 0 if match_case else re.IGNORECASE
@@ -1208,12 +2168,19 @@ class NotepadPy(QMainWindow):
             if not matches:
                 return 0
         
+            # match offsets count characters, the editor counts UTF-8 bytes
+            spans = []
+            position = offset = 0
+            for match in matches:
+                start = document_buffer.position_after(editor, position, match.start() - offset)
+                end = document_buffer.position_after(editor, start, match.end() - match.start())
+                spans.append((start, end))
+                position, offset = end, match.end()
+
             editor.beginUndoAction()
         
             try:
-                for match in reversed(matches):
-                    start, end = match.span()
-
+                for start, end in reversed(spans):
                     editor.SendScintilla(QsciScintilla.SCI_SETSEL, start, end)
                 
                     editor.replaceSelectedText(replace_text)
@@ -1252,7 +2219,6 @@ class NotepadPy(QMainWindow):
         use_regex = options["use_regex"]
         forward = options["direction"] == "down"
 
-        full_text = editor.text()
         current_position = editor.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)
 
         if self.config.get("debugMode", True):
@@ -1270,29 +2236,37 @@ class NotepadPy(QMainWindow):
                 pattern = re.compile(escaped_text, flags)
 
             match = None
-
-            if forward:
-                match = pattern.search(full_text, pos=current_position)
+            viewer = self.large_files.get(editor)
+
+            if viewer is not None:
+                # large files are searched in place rather than through the editor
+                match = viewer.find(pattern.pattern, flags, forward, wrap_around)
+            # searching backwards only needs the text before the caret
+            elif forward:
+                full_text = document_buffer.read_text(editor)
+                match = pattern.search(full_text, pos=document_buffer.character_offset(editor, current_position))
                 if not match and wrap_around:
                     match = pattern.search(full_text, pos=0)
             else:
-                matches = list(pattern.finditer(full_text[:current_position]))
+                matches = list(pattern.finditer(document_buffer.read_text(editor, 0, current_position)))
                 if matches:
                     match = matches[-1]
                 elif wrap_around:
-                    matches = list(pattern.finditer(full_text))
+                    matches = list(pattern.finditer(document_buffer.read_text(editor)))
                     if matches:
                         match = matches[-1]
 
-            if match:
-                start, end = match.span()
+            if match and viewer is None:
+                # match offsets count characters, the editor counts UTF-8 bytes
+                start = document_buffer.position_after(editor, 0, match.start())
+                end = document_buffer.position_after(editor, start, match.end() - match.start())
 
                 if forward:
                     editor.SendScintilla(QsciScintilla.SCI_SETSEL, start, end)
                 else:
                     editor.SendScintilla(QsciScintilla.SCI_SETSEL, end, start)
                     
-            else:
+            elif not match:
                 direction_text = "upwards" if not forward else "downwards"
                 if wrap_around:
                     QMessageBox.information(self, "Find", f"'{search_text}' not found in the entire file.")
@@ -1305,6 +2279,12 @@ class NotepadPy(QMainWindow):
     def find_next(self):
         """Finds the next occurrence in a specified search."""
         editor = self.tabs.currentWidget()
+        if isinstance(editor, HexView):
+            if self.last_byte_search:
+                self.find_bytes(editor, True)
+            else:
+                self.find_bytes_dialog(editor)
+            return
         if not isinstance(editor, QsciScintilla):
             return 
         
@@ -1316,6 +2296,12 @@ class NotepadPy(QMainWindow):
     def find_previous(self):
         """Finds the previous occurrence in a specified search."""
         editor = self.tabs.currentWidget()
+        if isinstance(editor, HexView):
+            if self.last_byte_search:
+                self.find_bytes(editor, False)
+            else:
+                self.find_bytes_dialog(editor)
+            return
         if not isinstance(editor, QsciScintilla):
             return 
         
@@ -1401,6 +2387,8 @@ class NotepadPy(QMainWindow):
 
 # only allow a single instance to run
 def check_duplicate_instance(app_id="NotepadPy"):
+    from PyQt6.QtNetwork import QLocalSocket
+
     socket = QLocalSocket()
     socket.connectToServer(app_id)
     
@@ -1411,6 +2399,12 @@ def check_duplicate_instance(app_id="NotepadPy"):
     return False
     
 def setup_single_instance_server(app_id="NotepadPy"):
+    try:
+        from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+    except ImportError as e:
+        print(f"Failed to import QtNetwork. {e}\nNetworking functions will be unavailable.")
+        return None
+
     server = QLocalServer()
     if not server.listen(app_id):
         existing_instance = QLocalSocket()
@@ -53,6 +53,8 @@ class NotepadPlusPlusConverter:
             keywords3 = []
             keywords4 = []
             operators = []
+            fold_open = []
+            fold_close = []
             line_comment = ""
             block_comment_start = ""
             block_comment_end = ""
@@ -92,6 +94,15 @@ class NotepadPlusPlusConverter:
                 kw4 = keywords_elem.find('.//Keywords[@name="Keywords4"]')
                 if kw4 is not None and kw4.text:
                     keywords4 = [kw.strip() for kw in kw4.text.split() if kw.strip()]
+                
+                for folder in ("Folders in code1", "Folders in code2"):
+                    fold_open_elem = keywords_elem.find(f'.//Keywords[@name="{folder}, open"]')
+                    if fold_open_elem is not None and fold_open_elem.text:
+                        fold_open += [m.strip() for m in fold_open_elem.text.split() if m.strip()]
+                    
+                    fold_close_elem = keywords_elem.find(f'.//Keywords[@name="{folder}, close"]')
+                    if fold_close_elem is not None and fold_close_elem.text:
+                        fold_close += [m.strip() for m in fold_close_elem.text.split() if m.strip()]
             
             styles = {}
             styles_elem = user_lang.find('.//Styles')
@@ -142,6 +153,8 @@ class NotepadPlusPlusConverter:
                 'keywords2': keywords2,
                 'keywords3': keywords3,
                 'keywords4': keywords4,
+                'fold_open': fold_open,
+                'fold_close': fold_close,
                 'styles': styles
             }
             
@@ -1,6 +1,8 @@
 import logging
 from PyQt6.QtWidgets import QMenu, QMessageBox
 
+import document_buffer
+
 class PluginAPI:
     def __init__(self, app, plugin_manager):
         self.app = app
@@ -70,10 +72,27 @@ class PluginAPI:
         """Returns the complete text of the active document. Introduced in version: v0.0.1"""
         current_editor = self.app.tabs.currentWidget()
         if current_editor.__class__.__name__ == "QsciScintilla":
-            return current_editor.text()
+            return document_buffer.read_text(current_editor)
         else:
             return None
 
+    ## Get Text Range
+    def get_text_range(self, start, end):
+        """Returns the text of the active document between two positions, reading only that range.
+        Positions count UTF-8 bytes, like the editor's own. Introduced in version: v0.0.2"""
+        editor = self.get_current_editor()
+        if editor:
+            return document_buffer.read_text(editor, start, end)
+        return None
+
+    ## Get Document Length
+    def get_document_length(self):
+        """Returns the length of the active document in UTF-8 bytes. Introduced in version: v0.0.2"""
+        editor = self.get_current_editor()
+        if editor:
+            return editor.length()
+        return None
+
     ## Log
     def log(self, message: str, level: str = "info"):
         """Logs a message to the console. Introduced in version: v0.0.1"""
@@ -218,6 +237,22 @@ class PluginAPI:
         if hasattr(self.app, "save_all_files"):
             self.app.save_all_files()
 
+    ## Get File Encoding
+    def get_file_encoding(self):
+        """Return the encoding the current file was read in (None for new files and files shown as hex). Introduced in version: v0.0.2"""
+        editor = self.get_current_editor()
+        if editor:
+            return self.app.file_encodings.get(editor)
+        return None
+
+    ## Set File Encoding
+    def set_file_encoding(self, encoding=None):
+        """Reopen the current file in the given encoding and remember it for that file; None goes back to detecting it. Introduced in version: v0.0.2"""
+        editor = self.get_current_editor()
+        if editor and hasattr(self.app, "set_file_encoding"):
+            return self.app.set_file_encoding(editor, encoding)
+        return False
+
     ## Print File
     def print_current_file(self):
         """Print the current file using the app's print dialog. Introduced in version: v0.0.1"""
@@ -0,0 +1,28 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+
+class TabPlaceholder(QWidget):
+    """Stands in for a restored tab until it's first shown.
+
+    It only holds the tab's session entry (path, modified state, caret and lexer), so a
+    session with many tabs comes back without reading any of their files. The window opens
+    the file in its place when the tab is activated."""
+
+    def __init__(self, file_info, parent=None):
+        super().__init__(parent)
+        self.file_info = file_info
+        self.error = None # why its file couldn't be opened, once it's been tried
+
+        self.label = QLabel(self)
+        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.label)
+
+    @property
+    def is_modified(self):
+        return self.file_info.get("is_modified", False)
+
+    def show_error(self, message):
+        self.error = message
+        self.label.setText(message)
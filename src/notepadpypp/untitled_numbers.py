@@ -0,0 +1,46 @@
+import heapq
+import re
+
+UNTITLED_PATTERN = re.compile(r"^new (\d+)", re.IGNORECASE)
+
+
+def untitled_number(name):
+    """Returns the N of a "new N" tab title or backup name, or None if it isn't one."""
+    match = UNTITLED_PATTERN.match(name)
+    return int(match.group(1)) if match else None
+
+
+class UntitledNumbers:
+    """Hands out the numbers of new tabs, "new 1", "new 2" and so on, always the lowest one
+    that isn't taken.
+
+    Numbers are taken while a tab or a backup has them and released when it's gone. Released
+    numbers go on a heap, so the lowest free one is found in O(log n) without looking at
+    the tabs or backups again."""
+
+    def __init__(self):
+        self.used = set()
+        self.released = [] # heap of released numbers, some of which may have been taken since
+        self.next = 1 # lowest number never handed out or taken
+
+    def take(self, number):
+        """Marks a number as in use."""
+        self.used.add(number)
+        while self.next in self.used:
+            self.next += 1
+
+    def allocate(self):
+        """Takes and returns the lowest free number."""
+        while self.released:
+            number = heapq.heappop(self.released)
+            if number not in self.used:
+                self.take(number)
+                return number
+        number = self.next
+        self.take(number)
+        return number
+
+    def release(self, number):
+        if number in self.used:
+            self.used.discard(number)
+            heapq.heappush(self.released, number)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "notepadpypp"))
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+from hex_view import HexView, parse_byte_pattern
+
+app = QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def hex_view(tmp_path):
+    file_path = tmp_path / "program.exe"
+    file_path.write_bytes(b"MZ\x90\x00" + b"\x00" * 60 + b"MZ")
+    view = HexView(str(file_path))
+    yield view
+    view.close_file()
+
+
+def test_find_match_at_cursor(hex_view):
+    assert hex_view.find(parse_byte_pattern("4D 5A"))
+    assert hex_view.selection() == (0, 2)
+
+
+def test_find_next_skips_selected_match(hex_view):
+    pattern = parse_byte_pattern("4D 5A")
+    hex_view.find(pattern)
+    assert hex_view.find(pattern)
+    assert hex_view.selection() == (64, 66)
+    assert not hex_view.find(pattern)